@@ -0,0 +1,221 @@
+# batch_processor.py
+"""녹화된 동영상/이미지 폴더에 대한 오프라인 ArUco 일괄 처리.
+
+입력을 프레임 구간(shard)으로 나누어 프로세스 풀에 분배합니다. 각 워커는
+자신의 캘리브레이션 맵과 ArucoDetector를 캐시한 채 디코딩 -> 왜곡 보정 ->
+감지를 화면 표시 없이 수행하고, 결과는 프레임 번호와 timestamp를 키로 하는
+컬럼형 파일(CSV/Parquet/NPZ)로 저장됩니다.
+"""
+import csv
+import multiprocessing as mp
+import os
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import config
+from calibration_utils import load_calibration_cached
+from frame_sources import ImageDirectorySource, VideoFileSource
+from image_processor import Undistorter, detect_aruco, load_detector_profile
+
+# tx/ty/tz: 이동 벡터(m), rx/ry/rz: 회전 벡터(Rodrigues, rad), reproj_error: 재투영 오차(px)
+# 화면 표시용 반올림 값이 아닌 solvePnP 원본 값을 저장
+COLUMNS = ["frame_index", "timestamp", "marker_id", "tx", "ty", "tz", "rx", "ry", "rz", "distance", "reproj_error"]
+
+# 워커 프로세스별 상태 (initializer에서 설정)
+_worker = {}
+
+
+def _init_worker(calibration_file, aruco_type, marker_length, detector_profile=None):
+    """워커 프로세스 초기화: 캘리브레이션과 감지 파라미터 프로파일을 로드하고 OpenCV 내부 스레드를 1개로 제한합니다."""
+    # 프로세스 단위로 병렬화하므로 OpenCV 내부 스레드 경쟁을 막음
+    cv2.setNumThreads(1)
+    if detector_profile and os.path.exists(detector_profile):
+        try:
+            load_detector_profile(detector_profile)
+        except Exception as e:
+            print(f"[경고] 워커 {os.getpid()} 감지 파라미터 프로파일 로드 실패: {e}")
+    K, D, undistorter = None, None, None
+    if calibration_file:
+        try:
+            frame_size = (config.FRAME_WIDTH, config.FRAME_HEIGHT)
+            K, D, maps = load_calibration_cached(calibration_file, frame_size)
+            undistorter = Undistorter(K, D, maps, frame_size)
+        except Exception as e:
+            print(f"[경고] 워커 {os.getpid()} 캘리브레이션 로드 실패: {e}")
+    _worker.update(K=K, D=D, undistorter=undistorter, aruco_type=aruco_type, marker_length=marker_length)
+
+
+def _process_frame(frame, index, timestamp, rows):
+    """프레임 하나를 처리해 rows에 추가합니다. 실패하면 경고를 출력하고 False를 반환합니다."""
+    try:
+        _detect_frame(frame, index, timestamp, rows)
+        return True
+    except Exception as e:
+        # 손상된 프레임 하나 때문에 전체 일괄 처리가 중단되지 않도록 함
+        print(f"[경고] 프레임 {index} 처리 실패: {e}")
+        return False
+
+
+def _detect_frame(frame, index, timestamp, rows):
+    new_K, D = _worker["K"], _worker["D"]
+    if _worker["undistorter"] is not None:
+        frame, new_K = _worker["undistorter"](frame)
+
+    _, detected_info = detect_aruco(
+        frame, new_K, D, _worker["aruco_type"], _worker["marker_length"], draw=False, verbose=False
+    )
+    frame_rows = []
+    for info in detected_info:
+        frame_rows.append((index, timestamp, info["id"], *info["tvec_m"], *info["rvec_rad"],
+                     info["distance"], info["reproj_error"]))
+    rows.extend(frame_rows)  # 처리 중 실패하면 프레임 일부 결과만 남지 않도록 마지막에 추가
+
+
+def _process_video_shard(shard):
+    """동영상의 [start, end) 프레임 구간을 처리합니다. (처리 프레임 수, 실패 프레임 수, 결과 행)"""
+    path, start, end, fps = shard
+    rows = []
+    processed = 0
+    failed = 0
+    read = 0
+    source = VideoFileSource(path, prefetch=4, start_frame=start).start()
+    try:
+        for _ in range(start, end):
+            try:
+                frame = source.read()
+            except Exception as e:
+                print(f"[경고] 구간 [{start}, {end}) 프레임 {start + read} 읽기 실패: {e}")
+                break
+            if frame is None:
+                break
+            read += 1
+            index = source.frame_index
+            # 탐색(seek) 이후 POS_MSEC는 코덱에 따라 부정확할 수 있으므로 fps 기준으로 계산
+            timestamp = index / fps if fps > 0 else source.last_timestamp
+            if _process_frame(frame, index, timestamp, rows):
+                processed += 1
+            else:
+                failed += 1
+    finally:
+        source.release()
+    if read < end - start:
+        print(f"[경고] 구간 [{start}, {end}) 중 {read} 프레임만 읽었습니다: {path}")
+        failed += end - start - read
+    return processed, failed, rows
+
+
+def _process_image_shard(shard):
+    """이미지 파일 목록 [(index, path, timestamp), ...]을 처리합니다. (처리 프레임 수, 실패 프레임 수, 결과 행)"""
+    processed = 0
+    failed = 0
+    rows = []
+    for index, path, timestamp in shard:
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"[경고] 프레임 {index} 이미지 읽기 실패: {path}")
+            failed += 1
+            continue
+        if _process_frame(frame, index, timestamp, rows):
+            processed += 1
+        else:
+            failed += 1
+    return processed, failed, rows
+
+
+def _plan_shards(input_path, num_shards):
+    """입력을 num_shards개 내외의 구간으로 나눕니다. (처리 함수, 구간 목록, 총 프레임 수)를 반환합니다."""
+    path = Path(input_path)
+    if path.is_dir():
+        images = ImageDirectorySource(path, prefetch=0)
+        items = [
+            (i, str(f), images.timestamps[i] if images.timestamps else i / images.fps)
+            for i, f in enumerate(images.files)
+        ]
+        step = max(1, -(-len(items) // num_shards))
+        return _process_image_shard, [items[i:i + step] for i in range(0, len(items), step)], len(items)
+
+    video = VideoFileSource(path, prefetch=0)
+    total, fps = video.frame_count, video.fps
+    video.release()
+    if total <= 0:
+        raise IOError(f"동영상 {path}의 프레임 수를 알 수 없습니다.")
+    step = max(1, -(-total // num_shards))
+    shards = [(str(path), s, min(s + step, total), fps) for s in range(0, total, step)]
+    return _process_video_shard, shards, total
+
+
+def write_detections(rows, output_path, fmt=None):
+    """감지 결과를 컬럼형 파일로 저장합니다. fmt는 csv, parquet, npz 중 하나 (기본: 확장자로 추론)."""
+    output_path = Path(output_path)
+    fmt = (fmt or output_path.suffix.lstrip(".") or "csv").lower()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fmt == "csv":
+        with open(output_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(rows)
+        return output_path
+
+    columns = list(zip(*rows)) if rows else [[] for _ in COLUMNS]
+    arrays = {
+        "frame_index": np.asarray(columns[0], dtype=np.int64),
+        "timestamp": np.asarray(columns[1], dtype=np.float64),
+        "marker_id": np.asarray(columns[2], dtype=np.int32),
+    }
+    for name, col in zip(COLUMNS[3:], columns[3:]):
+        arrays[name] = np.asarray(col, dtype=np.float64)
+
+    if fmt == "npz":
+        np.savez_compressed(output_path, **arrays)
+    elif fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet 출력에는 pyarrow가 필요합니다: pip install pyarrow")
+        pq.write_table(pa.table(arrays), output_path)
+    else:
+        raise ValueError(f"지원하지 않는 출력 형식: {fmt}")
+    return output_path
+
+
+def run_batch(input_path, output_path, calibration_file=None, aruco_type=config.ARUCO_DICT_TYPE,
+              marker_length=config.ARUCO_MARKER_LENGTH, workers=None, fmt=None, shards_per_worker=4,
+              detector_profile=None):
+    """입력 전체를 프로세스 풀로 처리하고 결과 파일 경로를 반환합니다."""
+    workers = workers or os.cpu_count() or 1
+    # 워커 수보다 많은 구간으로 나누어 부하 불균형을 줄임
+    process_fn, shards, total = _plan_shards(input_path, workers * shards_per_worker)
+    print(f"일괄 처리 시작: {input_path} ({total} 프레임, {len(shards)} 구간, 워커 {workers})")
+
+    if calibration_file:
+        # 워커들이 동시에 캐시를 만들지 않도록 메인 프로세스에서 미리 생성
+        try:
+            load_calibration_cached(calibration_file, (config.FRAME_WIDTH, config.FRAME_HEIGHT))
+        except Exception as e:
+            print(f"[경고] 캘리브레이션 캐시 생성 실패: {e}")
+
+    rows = []
+    done = 0
+    failed = 0
+    start_time = time.time()
+    with mp.get_context("spawn").Pool(
+        workers, initializer=_init_worker, initargs=(calibration_file, aruco_type, marker_length, detector_profile)
+    ) as pool:
+        for count, shard_failed, shard_rows in pool.imap_unordered(process_fn, shards):
+            rows.extend(shard_rows)
+            done += count
+            failed += shard_failed
+            elapsed = time.time() - start_time
+            print(f"[정보] 진행: {done}/{total} 프레임 ({done / elapsed:.1f} FPS)")
+
+    rows.sort(key=lambda r: (r[0], r[2]))
+    elapsed = time.time() - start_time
+    path = write_detections(rows, output_path, fmt)
+    print(f"일괄 처리 완료: {done}/{total} 프레임 (실패 {failed}), 감지 {len(rows)}건, {elapsed:.1f}초 "
+          f"({done / elapsed if elapsed > 0 else 0:.1f} FPS) -> {path}")
+    return path
@@ -1,8 +1,16 @@
-import yaml
+import hashlib
+import os
+from pathlib import Path
+
 import numpy as np
 
+CACHE_VERSION = 1
+
+
 def save_calibration_to_yaml(filename, K, D):
     """카메라 매트릭스(K)와 왜곡 계수(D)를 YAML 파일에 저장합니다."""
+    import yaml
+
     data = {
         "K": K.tolist(),
         "D": D.tolist()
@@ -12,8 +20,67 @@ def save_calibration_to_yaml(filename, K, D):
 
 def load_calibration_from_yaml(filename):
     """YAML 파일에서 카메라 매트릭스(K)와 왜곡 계수(D)를 로드합니다."""
+    import yaml
+
     with open(filename, 'r') as f:
         data = yaml.safe_load(f)
     K = np.array(data["K"])
     D = np.array(data["D"])
     return K, D
+
+def calibration_cache_path(filename):
+    """YAML 파일 옆에 위치하는 바이너리 캐시(.cache.npz) 경로를 반환합니다."""
+    return Path(filename).with_suffix(".cache.npz")
+
+def load_calibration_cached(filename, frame_size=None):
+    """캐시를 이용해 K, D와 왜곡 보정 맵을 로드합니다.
+
+    YAML 파싱과 맵 계산은 캐시가 없거나 YAML이 변경되었을 때(mtime/해시)만 수행합니다.
+    frame_size=(w, h)를 주면 (map1, map2, new_K)를 함께 반환하고, 주지 않으면 maps는 None입니다.
+    반환값: K, D, maps
+    """
+    yaml_path = Path(filename)
+    cache_path = calibration_cache_path(yaml_path)
+    stat = yaml_path.stat()  # 파일이 없으면 FileNotFoundError
+    digest = None
+
+    try:
+        with np.load(cache_path) as cache:
+            valid = int(cache["version"]) == CACHE_VERSION
+            if valid and float(cache["yaml_mtime"]) != stat.st_mtime:
+                # mtime만 바뀐 경우(복사, checkout 등) 내용 해시로 다시 확인
+                digest = hashlib.sha1(yaml_path.read_bytes()).hexdigest()
+                valid = str(cache["yaml_sha1"]) == digest
+            if valid:
+                K, D = cache["K"], cache["D"]
+                if frame_size is None:
+                    return K, D, None
+                if "map1" in cache and tuple(cache["frame_size"]) == tuple(frame_size):
+                    return K, D, (cache["map1"], cache["map2"], cache["new_K"])
+    except (OSError, KeyError, ValueError):
+        pass  # 캐시 없음 또는 손상 -> 재생성
+
+    K, D = load_calibration_from_yaml(yaml_path)
+    data = {
+        "version": CACHE_VERSION,
+        "yaml_mtime": stat.st_mtime,
+        "yaml_sha1": digest or hashlib.sha1(yaml_path.read_bytes()).hexdigest(),
+        "K": K,
+        "D": D,
+    }
+    maps = None
+    if frame_size is not None:
+        from image_processor import build_undistort_maps
+
+        maps = build_undistort_maps(K, D, frame_size)
+        data.update(frame_size=np.array(frame_size), map1=maps[0], map2=maps[1], new_K=maps[2])
+
+    try:
+        # 여러 프로세스가 동시에 쓰더라도 깨진 캐시가 보이지 않도록 임시 파일 후 교체
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **data)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        print(f"[경고] 캘리브레이션 캐시 저장 실패 ({cache_path}): {e}")
+    return K, D, maps
@@ -2,34 +2,44 @@
 import cv2
 import time
 
+from frame_sources import open_source
+
 class CameraHandler:
     def __init__(self, index, width, height, fps, buffer_size):
-        self.cap = cv2.VideoCapture(index)
-        if not self.cap.isOpened():
-            raise IOError(f"카메라 인덱스 {index}를 열 수 없습니다.")
-
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
-        self.cap.set(cv2.CAP_PROP_FPS, fps)
-        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
-        print(f"카메라 초기화 완료: {width}x{height} @ {fps}FPS, 버퍼 {buffer_size}")
+        # index는 카메라 인덱스 또는 frame_sources.open_source 소스 지정 문자열
+        # (동영상 파일, 이미지 디렉터리, synthetic, replay:...)
+        try:
+            self.source = open_source(index, width, height, fps, buffer_size)
+        except IOError as e:
+            raise IOError(f"프레임 소스 {index}를 열 수 없습니다: {e}")
+        print(f"카메라 초기화 완료: {type(self.source).__name__}({index}) {width}x{height} @ {fps}FPS, 버퍼 {buffer_size}")
 
         # MyCobot 관련 코드는 여기서 제외 (run_server.py에서 처리)
 
+    @property
+    def finished(self):
+        """파일 기반 소스의 스트림이 끝났는지 여부."""
+        return self.source.finished
+
+    @property
+    def last_timestamp(self):
+        """마지막으로 캡처한 프레임의 캡처 시각."""
+        return self.source.last_timestamp
+
     def capture_frame(self):
         """카메라에서 프레임을 캡처하여 반환합니다."""
-        ret, frame = self.cap.read()
-        if not ret:
-            print("카메라에서 프레임을 읽는 데 실패했습니다.")
-            time.sleep(0.1) # 잠시 대기
+        frame = self.source.read()
+        if frame is None:
+            if not self.source.finished:
+                print("카메라에서 프레임을 읽는 데 실패했습니다.")
+                time.sleep(0.1) # 잠시 대기
             return None
         return frame
 
     def release_camera(self):
         """카메라 장치를 해제합니다."""
-        if self.cap.isOpened():
-            self.cap.release()
-            print("카메라 리소스 해제 완료.")
+        self.source.release()
+        print("카메라 리소스 해제 완료.")
 
 # 테스트용 (직접 실행 시)
 if __name__ == '__main__':
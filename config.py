@@ -1,15 +1,22 @@
-import cv2
-
 # 네트워크 설정
 SERVER_IP = "192.168.0.155"
 CLIENT_IP = "0.0.0.0"
 PORT = 5000
 
+POSE_PORT = 5001  # 포즈 패킷 전송 포트 (run_server.py --mode pose)
+POSE_CONTROL_PORT = 5002  # 포즈 게시자 구독 요청 포트
+POSE_UNIX_SOCKET = "/tmp/aruco_poses.sock"  # 같은 장비 구독자용 Unix 소켓 경로
+
 # UDP 설정
 CHUNK_SIZE = 1400  # MTU 고려
 SERVER_SEND_BUFFER = 65536
 CLIENT_RECV_BUFFER = 262144
 
+# UDP 재조립 정책 (udp_receiver.UdpReceiver)
+RECV_POLICY = "latest"  # latest: 최신 프레임 우선, all: 완성된 모든 프레임 전달
+RECV_MAX_FRAMES = 8  # 동시에 재조립 중인 최대 프레임 수
+RECV_MAX_BYTES = 8 * 1024 * 1024  # 재조립 버퍼 최대 바이트
+
 # UDP 카메라 설정
 UDP_CAMERA_INDEX = 0
 UDP_CALIBRATION_FILE = "camera_params/jetcobot.yaml"
@@ -18,6 +25,12 @@ UDP_CALIBRATION_FILE = "camera_params/jetcobot.yaml"
 USB_CAMERA_INDEX = 2
 USB_CALIBRATION_FILE = "camera_params/global.yaml"
 
+# 다중 카메라 설정 (run_client.py --source multi)
+MULTI_CAMERA_SOURCES = ["0", "2"]  # 카메라 인덱스 또는 소스 지정 문자열
+MULTI_CAMERA_CALIBRATION_FILES = ["camera_params/global.yaml", "camera_params/global.yaml"]
+MULTI_CAMERA_MAX_INFLIGHT = 1  # 카메라별 동시에 처리 중인 최대 프레임 수 (공정 스케줄링)
+MULTI_CAMERA_STATS_INTERVAL = 5.0  # 카메라별 통계 출력 간격 (초)
+
 # 카메라 공통 설정
 FRAME_WIDTH = 640
 FRAME_HEIGHT = 480
@@ -25,28 +38,77 @@ FRAME_RATE = 30  # 목표 FPS
 CAMERA_BUFFERSIZE = 1
 JPEG_QUALITY = 80
 
+# 움직임 기반 전송 설정 (run_server.py --motion, motion_gate.py)
+MOTION_MODE = "off"  # off: 매 프레임 전송, full: 변화 시 전체 프레임, tiles: 변한 타일만, roi: ROI만
+MOTION_ROI = None  # roi 모드 관심 영역 (x, y, w, h)
+MOTION_THRESHOLD = 0.002  # 변화 점수(변한 축소 픽셀 비율)가 이 값 미만이면 변화 없음
+MOTION_PIXEL_THRESHOLD = 12  # 축소 그레이 영상에서 변화로 보는 픽셀 차이
+MOTION_DOWNSCALE = 8  # 변화 점수 계산용 축소 비율
+MOTION_TILE_SIZE = 64  # 타일 크기 (MOTION_DOWNSCALE의 배수)
+MOTION_MAX_TILE_FRACTION = 0.5  # 변한 타일을 감싸는 사각형의 면적 비율이 이보다 크면 전체 프레임 전송
+MOTION_KEEPALIVE_INTERVAL = 1.0  # 변화 없을 때 keep-alive 전송 간격 (초)
+MOTION_KEYFRAME_INTERVAL = 5.0  # 손실 복구용 전체 프레임 재전송 간격 (초)
+# 포즈 추적/지연 보정 설정 (run_client.py --track_poses, pose_tracker.py)
+TRACKER_MAX_ID = 1023  # 추적할 최대 마커 ID (ID별 상태 배열 크기)
+TRACKER_ALPHA = 0.5  # 위치 보정 게인 (클수록 측정값을 빨리 따라감)
+TRACKER_BETA = 0.1  # 속도 보정 게인
+TRACKER_MAX_AGE = 0.5  # 이 시간(초) 이상 감지되지 않은 마커는 출력하지 않음
+TRACKER_MAX_EXTRAPOLATION = 0.2  # 최대 외삽 시간 (초)
+TRACKER_OUTPUT_HZ = 100  # 예측 포즈 게시 주기 (Hz)
+
+# 녹화 설정 (run_client.py --record)
+RECORD_SEGMENT_SECONDS = 300  # 구간 파일 최대 길이(초), 0이면 제한 없음
+RECORD_SEGMENT_MB = 0  # 구간 파일 최대 크기(MB), 0이면 제한 없음
+RECORD_CODEC = "mp4v"
+RECORD_QUEUE_SIZE = 64  # 녹화 대기 프레임 수 (초과 시 프레임 버림)
+
+DISPLAY_FPS = 30  # 렌더 스레드 최대 표시 FPS (0이면 처리 루프에서 직접 표시)
+
+# 포즈 모드 모니터링용 썸네일 설정
+THUMBNAIL_FPS = 1.0  # 0이면 전송 안 함
+THUMBNAIL_WIDTH = 160
+
+# 공유 메모리 프레임 링 설정 (run_client.py --shm_ring)
+SHM_FRAME_RING_NAME = "aruco_frames"
+SHM_FRAME_RING_SLOTS = 8
+
+# ArUco 감지 파라미터 프로파일 (detector_tuner.py 결과, 파일이 있으면 시작 시 로드)
+DETECTOR_PROFILE_FILE = "camera_params/detector_profile.yaml"
+
 DEFAULT_CAMERA_INDEX = 0
 DEFAULT_CALIBRATION_FILE = "camera_params/calibration.yaml"
 
 # Aruco 마커 설정
 ARUCO_DICT_TYPE = "DICT_6X6_250"
 ARUCO_MARKER_LENGTH = 0.06  # ArUco 마커 실제 크기 (미터 단위)
-ARUCO_DICT = {
-    "DICT_4X4_50": cv2.aruco.DICT_4X4_50,
-    "DICT_4X4_100": cv2.aruco.DICT_4X4_100,
-    "DICT_4X4_250": cv2.aruco.DICT_4X4_250,
-    "DICT_4X4_1000": cv2.aruco.DICT_4X4_1000,
-    "DICT_5X5_50": cv2.aruco.DICT_5X5_50,
-    "DICT_5X5_100": cv2.aruco.DICT_5X5_100,
-    "DICT_5X5_250": cv2.aruco.DICT_5X5_250,
-    "DICT_5X5_1000": cv2.aruco.DICT_5X5_1000,
-    "DICT_6X6_50": cv2.aruco.DICT_6X6_50,
-    "DICT_6X6_100": cv2.aruco.DICT_6X6_100,
-    "DICT_6X6_250": cv2.aruco.DICT_6X6_250,
-    "DICT_6X6_1000": cv2.aruco.DICT_6X6_1000,
-    "DICT_7X7_50": cv2.aruco.DICT_7X7_50,
-    "DICT_7X7_100": cv2.aruco.DICT_7X7_100,
-    "DICT_7X7_250": cv2.aruco.DICT_7X7_250,
-    "DICT_7X7_1000": cv2.aruco.DICT_7X7_1000,
-    "DICT_ARUCO_ORIGINAL": cv2.aruco.DICT_ARUCO_ORIGINAL,
-}
+# ArUco 사전 이름 (cv2.aruco 상수 이름과 동일). cv2 import 없이 CLI 선택지 등에 사용
+ARUCO_DICT_NAMES = (
+    "DICT_4X4_50",
+    "DICT_4X4_100",
+    "DICT_4X4_250",
+    "DICT_4X4_1000",
+    "DICT_5X5_50",
+    "DICT_5X5_100",
+    "DICT_5X5_250",
+    "DICT_5X5_1000",
+    "DICT_6X6_50",
+    "DICT_6X6_100",
+    "DICT_6X6_250",
+    "DICT_6X6_1000",
+    "DICT_7X7_50",
+    "DICT_7X7_100",
+    "DICT_7X7_250",
+    "DICT_7X7_1000",
+    "DICT_ARUCO_ORIGINAL",
+)
+
+
+def __getattr__(name):
+    """ARUCO_DICT는 처음 접근할 때 cv2를 import하여 생성합니다 (시작 시간 단축)."""
+    if name == "ARUCO_DICT":
+        import cv2
+
+        aruco_dict = {key: getattr(cv2.aruco, key) for key in ARUCO_DICT_NAMES}
+        globals()["ARUCO_DICT"] = aruco_dict
+        return aruco_dict
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,249 @@
+# detector_tuner.py
+"""ArUco DetectorParameters 자동 튜닝 도구.
+
+녹화본 또는 합성 프레임에서 여러 DetectorParameters 조합을 실행하여 프레임당 시간과
+재현율(recall), 포즈 오차를 측정하고 파레토 프런트를 출력합니다. 목표 재현율과 최대
+포즈 오차를 만족하는 가장 빠른 조합을 프로파일 파일로 저장하면, 클라이언트가 시작할 때
+(--detector_profile) 이를 로드합니다.
+
+합성 프레임(synthetic[:N])은 마커를 그린 위치를 알고 있으므로 정답 코너로 계산한 포즈를
+정답(ground truth)으로 사용합니다. 녹화본은 정답이 없으므로 촘촘한 적응 임계값 창과
+서브픽셀 코너 보정을 사용한 기준 설정의 감지 결과를 대신 사용하며, 이때 오차는 정확도가
+아니라 "기준 대비 편차"입니다. 기준과 같은 코너 보정 방식의 조합은 기준과 같은 오차를
+공유해 편차가 0에 가깝게 나오므로 이 경우 탐색에서 제외합니다.
+
+예시:
+    python detector_tuner.py --source recording.mp4 --max_frames 300 --target_recall 0.99
+"""
+import argparse
+import itertools
+import time
+
+import cv2
+import numpy as np
+import yaml
+
+import config
+from calibration_utils import load_calibration_cached
+from frame_sources import open_source
+from image_processor import estimate_poses, make_detector_parameters, poses_from_corners
+
+# 기준 설정 (정답이 없는 녹화본용): 느리지만 가장 꼼꼼한 설정
+REFERENCE_PARAMS = {
+    "adaptiveThreshWinSizeMin": 3,
+    "adaptiveThreshWinSizeMax": 53,
+    "adaptiveThreshWinSizeStep": 4,
+    "cornerRefinementMethod": cv2.aruco.CORNER_REFINE_SUBPIX,
+}
+
+# 탐색 공간
+WINDOW_SIZES = [  # (min, max, step). 기본값은 (3, 23, 10)
+    (3, 23, 10),
+    (3, 13, 10),
+    (5, 15, 10),
+    (5, 25, 20),
+    (7, 7, 10),
+    (11, 11, 10),
+    (15, 15, 10),
+]
+CORNER_REFINEMENTS = {
+    "none": cv2.aruco.CORNER_REFINE_NONE,
+    "subpix": cv2.aruco.CORNER_REFINE_SUBPIX,
+    "contour": cv2.aruco.CORNER_REFINE_CONTOUR,
+}
+MIN_PERIMETER_RATES = [0.03, 0.05, 0.08]
+
+
+def candidate_params(exclude_refinement=None):
+    """탐색할 DetectorParameters 덮어쓰기 조합을 생성합니다."""
+    refinements = [r for r in CORNER_REFINEMENTS.values() if r != exclude_refinement]
+    for (wmin, wmax, wstep), refine, perimeter in itertools.product(
+        WINDOW_SIZES, refinements, MIN_PERIMETER_RATES
+    ):
+        yield {
+            "adaptiveThreshWinSizeMin": wmin,
+            "adaptiveThreshWinSizeMax": wmax,
+            "adaptiveThreshWinSizeStep": wstep,
+            "cornerRefinementMethod": refine,
+            "minMarkerPerimeterRate": perimeter,
+        }
+
+
+def load_frames(source_spec, max_frames):
+    """소스에서 최대 max_frames개의 프레임을 그레이스케일로 읽어 메모리에 올립니다.
+
+    반환값: (프레임 목록, 프레임별 정답 (corners, ids) 목록). 정답을 알 수 없는 소스는 None.
+    """
+    source = open_source(source_spec, loop=False)
+    frames = []
+    truth = [] if hasattr(source, "true_corners") else None
+    try:
+        while len(frames) < max_frames:
+            frame = source.read()
+            if frame is None:
+                if source.finished:
+                    break
+                continue
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            if truth is not None:
+                truth.append(source.true_corners(source.frame_index))
+    finally:
+        source.release()
+    return frames, truth
+
+
+def ground_truth_poses(truth, K, D, marker_length):
+    """정답 코너로 계산한 프레임별 포즈 목록."""
+    return [poses_from_corners(corners, ids, K, D, marker_length) for corners, ids in truth]
+
+
+def run_params(frames, params, K, D, aruco_type, marker_length, repeats=1):
+    """조합 하나를 모든 프레임에 실행합니다. (프레임당 평균 시간(초), 프레임별 포즈 목록)"""
+    aruco_dict = cv2.aruco.getPredefinedDictionary(config.ARUCO_DICT[aruco_type])
+    detector = cv2.aruco.ArucoDetector(aruco_dict, make_detector_parameters(params))
+    results = []
+    best = float("inf")
+    for _ in range(repeats):
+        results = []
+        start = time.perf_counter()
+        for gray in frames:
+            _, _, poses = estimate_poses(gray, K, D, aruco_type, marker_length, detector=detector)
+            results.append(poses)
+        best = min(best, (time.perf_counter() - start) / max(len(frames), 1))
+    return best, results
+
+
+def score(results, reference):
+    """정답(또는 기준) 대비 재현율과 이동 벡터 오차(mm, 중앙값/95%)를 계산합니다."""
+    matched = 0
+    total = 0
+    errors = []
+    for poses, ref in zip(results, reference):
+        total += len(ref)
+        if len(ref) == 0 or len(poses) == 0:
+            continue
+        found = {int(p["id"]): p for p in poses}
+        for r in ref:
+            p = found.get(int(r["id"]))
+            if p is not None:
+                matched += 1
+                errors.append(np.linalg.norm(p["tvec"] - r["tvec"]) * 1000)
+    recall = matched / total if total else 0.0
+    if errors:
+        return recall, float(np.median(errors)), float(np.percentile(errors, 95))
+    return recall, float("inf"), float("inf")
+
+
+def pareto_front(rows):
+    """시간/오차는 작을수록, 재현율은 클수록 좋은 기준으로 지배되지 않는 조합만 남깁니다."""
+    front = []
+    for a in rows:
+        dominated = any(
+            b["time_ms"] <= a["time_ms"] and b["recall"] >= a["recall"] and b["error_mm"] <= a["error_mm"]
+            and (b["time_ms"] < a["time_ms"] or b["recall"] > a["recall"] or b["error_mm"] < a["error_mm"])
+            for b in rows
+        )
+        if not dominated:
+            front.append(a)
+    return sorted(front, key=lambda r: r["time_ms"])
+
+
+def describe(params):
+    refine = {v: k for k, v in CORNER_REFINEMENTS.items()}.get(params["cornerRefinementMethod"], "?")
+    return (f"win {params['adaptiveThreshWinSizeMin']}-{params['adaptiveThreshWinSizeMax']}"
+            f"/{params['adaptiveThreshWinSizeStep']}, refine {refine}, "
+            f"perimeter {params['minMarkerPerimeterRate']}")
+
+
+def tune(frames, K, D, aruco_type, marker_length, target_recall, max_error_mm, repeats=2, truth=None):
+    """모든 조합을 평가하고 (전체 결과, 파레토 프런트, 선택된 조합)을 반환합니다.
+
+    truth(프레임별 정답 코너)가 있으면 정답 포즈 대비 오차를, 없으면 기준 설정 대비 편차를
+    측정합니다. 각 결과의 "error_basis"는 "ground_truth" 또는 "reference"입니다.
+    """
+    if truth is not None:
+        reference = ground_truth_poses(truth, K, D, marker_length)
+        basis, metric, exclude = "ground_truth", "오차", None
+        print(f"정답: 합성 프레임 마커 {sum(len(r) for r in reference)}개")
+    else:
+        ref_time, reference = run_params(frames, REFERENCE_PARAMS, K, D, aruco_type, marker_length)
+        basis, metric, exclude = "reference", "기준 대비 편차", REFERENCE_PARAMS["cornerRefinementMethod"]
+        print(f"기준 설정: {ref_time * 1000:.2f} ms/프레임, 마커 {sum(len(r) for r in reference)}개 감지 "
+              f"(정답이 없어 기준 대비 편차로 평가, 기준과 같은 코너 보정 조합은 제외)")
+    if sum(len(r) for r in reference) == 0:
+        raise ValueError("정답/기준 마커가 없습니다. 입력 프레임을 확인하세요.")
+
+    default_time, default_results = run_params(frames, {}, K, D, aruco_type, marker_length, repeats)
+    default_recall, default_err, _ = score(default_results, reference)
+    print(f"기본 설정: {default_time * 1000:.2f} ms/프레임, recall {default_recall:.3f}, "
+          f"{metric} {default_err:.2f} mm")
+
+    rows = []
+    candidates = list(candidate_params(exclude))
+    for i, params in enumerate(candidates, 1):
+        t, results = run_params(frames, params, K, D, aruco_type, marker_length, repeats)
+        recall, err, err95 = score(results, reference)
+        rows.append({"params": params, "time_ms": t * 1000, "recall": recall, "error_mm": err,
+                     "error95_mm": err95, "error_basis": basis})
+        print(f"[{i}/{len(candidates)}] {describe(params)}: {t * 1000:.2f} ms, recall {recall:.3f}, "
+              f"{metric} {err:.2f} mm")
+
+    front = pareto_front(rows)
+    eligible = [r for r in front if r["recall"] >= target_recall and r["error_mm"] <= max_error_mm]
+    chosen = eligible[0] if eligible else None
+    return rows, front, chosen
+
+
+def save_profile(filename, row, aruco_type, marker_length):
+    """선택된 조합을 클라이언트가 로드할 수 있는 YAML 프로파일로 저장합니다."""
+    profile = {
+        "aruco_type": aruco_type,
+        "marker_length": marker_length,
+        "parameters": {k: (int(v) if isinstance(v, (int, np.integer)) else float(v)) for k, v in row["params"].items()},
+        "metrics": {
+            "time_ms": round(row["time_ms"], 3),
+            "recall": round(row["recall"], 4),
+            "error_mm": round(row["error_mm"], 3),
+            "error95_mm": round(row["error95_mm"], 3),
+            "error_basis": row["error_basis"],  # ground_truth: 정답 대비 오차, reference: 기준 대비 편차
+        },
+    }
+    with open(filename, "w") as f:
+        yaml.safe_dump(profile, f, sort_keys=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ArUco DetectorParameters 자동 튜닝")
+    parser.add_argument("--source", type=str, default="synthetic:4",
+                        help="튜닝용 프레임 소스 (동영상, 이미지 디렉터리, synthetic[:N]) (기본값: synthetic:4)")
+    parser.add_argument("--max_frames", type=int, default=200, help="사용할 최대 프레임 수")
+    parser.add_argument("--calibration_file", type=str, default=config.USB_CALIBRATION_FILE,
+                        help=f"포즈 계산용 캘리브레이션 파일 (기본값: {config.USB_CALIBRATION_FILE})")
+    parser.add_argument("--aruco_type", type=str, default=config.ARUCO_DICT_TYPE, choices=config.ARUCO_DICT_NAMES)
+    parser.add_argument("--aruco_length", type=float, default=config.ARUCO_MARKER_LENGTH)
+    parser.add_argument("--target_recall", type=float, default=0.99, help="목표 재현율 (기본값: 0.99)")
+    parser.add_argument("--max_error_mm", type=float, default=5.0, help="허용 이동 벡터 오차 중앙값(mm) (기본값: 5)")
+    parser.add_argument("--repeats", type=int, default=2, help="시간 측정 반복 횟수 (최솟값 사용)")
+    parser.add_argument("--output", type=str, default=config.DETECTOR_PROFILE_FILE,
+                        help=f"프로파일 저장 경로 (기본값: {config.DETECTOR_PROFILE_FILE})")
+    args = parser.parse_args()
+
+    K, D, _ = load_calibration_cached(args.calibration_file)
+    frames, truth = load_frames(args.source, args.max_frames)
+    print(f"튜닝 프레임 {len(frames)}개 로드: {args.source}")
+
+    rows, front, chosen = tune(frames, K, D, args.aruco_type, args.aruco_length,
+                               args.target_recall, args.max_error_mm, args.repeats, truth)
+
+    metric = "오차" if truth is not None else "편차"
+    print(f"\n===== 파레토 프런트 (시간 순, {'정답 대비 오차' if truth is not None else '기준 대비 편차'}) =====")
+    for r in front:
+        print(f"{r['time_ms']:7.2f} ms  recall {r['recall']:.3f}  {metric} {r['error_mm']:6.2f} mm "
+              f"(95% {r['error95_mm']:.2f})  {describe(r['params'])}")
+
+    if chosen is None:
+        print(f"\n[경고] recall >= {args.target_recall}, {metric} <= {args.max_error_mm} mm 를 만족하는 조합이 없습니다. "
+              "프로파일을 저장하지 않습니다.")
+    else:
+        save_profile(args.output, chosen, args.aruco_type, args.aruco_length)
+        print(f"\n선택: {describe(chosen['params'])} ({chosen['time_ms']:.2f} ms) -> {args.output}")
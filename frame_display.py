@@ -0,0 +1,125 @@
+# frame_display.py
+"""처리 루프와 분리된 화면 표시.
+
+cv2.imshow + cv2.waitKey는 원격 X/VNC 환경에서 10~30 ms가 걸려 감지 속도를 화면
+속도로 묶어 버립니다. FrameDisplay는 최신 프레임 슬롯 하나만 두고 별도 렌더 스레드가
+max_fps 이하로 그리며, 'q' 입력은 show()의 반환값으로 알리고 's' 스냅샷은 별도 스레드에서
+저장합니다.
+
+주의: HighGUI 호출은 모두 렌더 스레드에서만 수행합니다. (macOS는 메인 스레드 표시만
+지원하므로 max_fps=0 으로 기존 동기 표시를 사용하세요.)
+"""
+import queue
+import threading
+import time
+
+import cv2
+
+from image_processor import display_frame, snapshot_path
+
+
+class SnapshotWriter:
+    """스냅샷 이미지를 백그라운드 스레드에서 저장합니다."""
+
+    def __init__(self, max_pending=8):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def save(self, frame):
+        """프레임을 저장 대기열에 넣습니다. 대기열이 가득 차면 건너뜁니다."""
+        try:
+            self._queue.put_nowait(frame)
+            return True
+        except queue.Full:
+            print("[경고] 스냅샷 저장 대기열이 가득 차 건너뜁니다.")
+            return False
+
+    def _run(self):
+        while True:
+            frame = self._queue.get()
+            if frame is None:
+                break
+            full_path = snapshot_path()
+            try:
+                cv2.imwrite(str(full_path), frame)
+                print(f"[정보] 이미지 저장됨: {full_path}")
+            except Exception as e:
+                print(f"[오류] 이미지 저장 실패: {e}")
+
+    def close(self):
+        """대기 중인 스냅샷을 모두 저장한 뒤 종료합니다."""
+        self._queue.put(None)
+        self._thread.join(timeout=5.0)
+
+
+class FrameDisplay:
+    """최신 프레임만 유지하는 렌더 스레드. max_fps <= 0 이면 기존 display_frame을 그대로 호출합니다."""
+
+    def __init__(self, window_title="Stream", max_fps=30):
+        self.window_title = window_title
+        self.max_fps = max_fps
+        self.rendered = 0
+        self.skipped = 0  # 표시되기 전에 새 프레임으로 대체된 프레임 수
+        self._frame = None
+        self._lock = threading.Lock()
+        self._running = max_fps > 0
+        self._quit = False
+        self._snapshots = None
+        self._thread = None
+        if self._running:
+            self._snapshots = SnapshotWriter()
+            self._thread = threading.Thread(target=self._render_loop, daemon=True)
+            self._thread.start()
+
+    def show(self, frame):
+        """프레임을 최신 슬롯에 넣습니다. 'q' 입력이 있었으면 "quit"을 반환합니다.
+
+        렌더 스레드가 참조를 그대로 사용하므로 넘긴 프레임은 이후 수정하지 않아야 합니다.
+        """
+        if not self._running:
+            return display_frame(frame, self.window_title)
+        if frame is not None and frame.size > 0:
+            with self._lock:
+                if self._frame is not None:
+                    self.skipped += 1
+                self._frame = frame
+        return "quit" if self._quit else None
+
+    def _render_loop(self):
+        interval = 1.0 / self.max_fps
+        next_time = time.perf_counter()
+        last_shown = None
+        while self._running:
+            # 새 프레임이 없어도 창 이벤트 처리를 위해 주기적으로 waitKey 호출
+            with self._lock:
+                frame, self._frame = self._frame, None
+            if frame is not None:
+                cv2.imshow(self.window_title, frame)
+                self.rendered += 1
+                last_shown = frame
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord("q"):
+                self._quit = True
+            elif key == ord("s") and last_shown is not None:
+                self._snapshots.save(last_shown)
+
+            # 표시 FPS 제한
+            next_time += interval
+            sleep_time = next_time - time.perf_counter()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+            else:
+                next_time = time.perf_counter()
+        cv2.destroyWindow(self.window_title)
+        cv2.waitKey(1)
+
+    def close(self):
+        """렌더 스레드를 멈추고 대기 중인 스냅샷을 저장합니다."""
+        if self._thread is not None:
+            self._running = False
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._snapshots is not None:
+            self._snapshots.close()
+            self._snapshots = None
@@ -0,0 +1,389 @@
+# frame_sources.py
+"""프레임 소스 추상화.
+
+카메라 장치(V4L2), 동영상 파일, 이미지 디렉터리, 합성 ArUco 마커 생성기,
+녹화본 재생을 동일한 인터페이스(read/release)로 제공합니다. 각 소스는
+백그라운드 스레드에서 미리 프레임을 읽고 디코딩해 둡니다.
+
+소스 지정 문자열 (open_source):
+    "0", "2", "/dev/video0"     -> CameraSource
+    "video.mp4", "file:video.mp4" -> VideoFileSource
+    "images/", "dir:images/"    -> ImageDirectorySource
+    "synthetic", "synthetic:4"  -> SyntheticMarkerSource (마커 4개)
+    "replay:recording/"         -> ReplaySource (원래 타이밍으로 재생)
+"""
+import queue
+import threading
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import config
+
+VIDEO_EXTENSIONS = {".mp4", ".avi", ".mkv", ".mov", ".m4v", ".webm", ".mjpeg", ".mjpg"}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff"}
+
+
+class FrameSource:
+    """모든 프레임 소스의 기반 클래스.
+
+    하위 클래스는 _read_frame()에서 (frame, timestamp)를 반환하고,
+    더 이상 프레임이 없으면 (None, None)을 반환합니다. _read_frame()에서 발생한 예외는
+    프리페치 스레드에서 잡아 두었다가 read()에서 다시 발생시킵니다 (이후 finished=True).
+    """
+
+    # 실시간 소스는 밀린 프레임을 버리고 최신 프레임만 유지
+    live = False
+
+    def __init__(self, prefetch=4):
+        self.prefetch = prefetch
+        self.finished = False
+        self.frame_index = -1  # 마지막으로 반환한 프레임 번호
+        self.last_timestamp = None  # 마지막으로 반환한 프레임의 캡처 시각
+        self.error = None  # 프리페치 스레드에서 발생한 예외
+        self._queue = None
+        self._thread = None
+        self._running = False
+        self._next_index = 0
+
+    def start(self):
+        """백그라운드 프리페치 스레드를 시작합니다."""
+        if self.prefetch <= 0 or self._thread is not None:
+            return self
+        self._queue = queue.Queue(maxsize=self.prefetch)
+        self._running = True
+        self._thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _prefetch_loop(self):
+        while self._running:
+            try:
+                frame, timestamp = self._read_frame()
+            except Exception as e:
+                # 장치 분리, 손상된 파일 등: 소비자가 read()에서 알 수 있도록 전달하고 종료
+                self.error = e
+                self._put(e)
+                break
+            item = None if frame is None else (self._next_index, timestamp, frame)
+            if item is not None:
+                self._next_index += 1
+            elif not self.live:
+                self._put(None)  # 스트림 종료 표시
+                break
+            else:
+                time.sleep(0.01)
+                continue
+            self._put(item)
+
+    def _put(self, item):
+        while self._running:
+            if self.live and item is not None:
+                # 소비자가 느리면 가장 오래된 프레임을 버림
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                    continue
+            try:
+                self._queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def read(self, timeout=1.0):
+        """다음 프레임을 반환합니다. 스트림이 끝났거나 시간 초과 시 None."""
+        if self.finished:
+            return None
+        if self._thread is None:
+            frame, timestamp = self._read_frame()
+            if frame is None:
+                if not self.live:
+                    self.finished = True
+                return None
+            self.frame_index = self._next_index
+            self._next_index += 1
+            self.last_timestamp = timestamp
+            return frame
+
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if item is None:
+            self.finished = True
+            return None
+        if isinstance(item, Exception):
+            self.finished = True
+            raise item
+        self.frame_index, self.last_timestamp, frame = item
+        return frame
+
+    def _read_frame(self):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+    def release(self):
+        """프리페치 스레드를 멈추고 자원을 해제합니다."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        self._close()
+
+
+class CameraSource(FrameSource):
+    """V4L2 등 카메라 장치 소스."""
+
+    live = True
+
+    def __init__(self, device, width=None, height=None, fps=None, buffer_size=None, prefetch=1):
+        super().__init__(prefetch)
+        self.cap = cv2.VideoCapture(device)
+        if not self.cap.isOpened():
+            raise IOError(f"카메라 {device}를 열 수 없습니다.")
+        if width:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        if height:
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        if buffer_size:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, buffer_size)
+
+    def _read_frame(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            return None, None
+        return frame, time.time()
+
+    def _close(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """동영상 파일 소스. timestamp는 파일 내 재생 시각(초)입니다."""
+
+    def __init__(self, path, loop=False, prefetch=8, start_frame=0):
+        super().__init__(prefetch)
+        self.path = str(path)
+        self.loop = loop
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            raise IOError(f"동영상 파일 {self.path}를 열 수 없습니다.")
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+        if start_frame > 0:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+            self._next_index = start_frame
+
+    def _read_frame(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if not ret:
+            return None, None
+        return frame, self.cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+    def _close(self):
+        if self.cap.isOpened():
+            self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """이미지 디렉터리 소스. 파일 이름 순서로 읽습니다.
+
+    디렉터리에 timestamps.txt(한 줄에 하나의 시각)가 있으면 이를 timestamp로 사용하고,
+    없으면 index / fps 를 사용합니다.
+    """
+
+    def __init__(self, path, fps=config.FRAME_RATE, loop=False, prefetch=8):
+        super().__init__(prefetch)
+        self.path = Path(path)
+        self.files = sorted(p for p in self.path.iterdir() if p.suffix.lower() in IMAGE_EXTENSIONS)
+        if not self.files:
+            raise IOError(f"이미지 디렉터리 {self.path}에 이미지가 없습니다.")
+        self.fps = fps
+        self.loop = loop
+        self.frame_count = len(self.files)
+        self.timestamps = None
+        ts_file = self.path / "timestamps.txt"
+        if ts_file.exists():
+            try:
+                values = [float(line) for line in ts_file.read_text().split() if line.strip()]
+            except ValueError as e:
+                raise IOError(f"timestamps.txt 형식이 잘못되었습니다 ({ts_file}): {e}") from e
+            if len(values) >= len(self.files):
+                self.timestamps = values
+        self._pos = 0
+
+    def _read_frame(self):
+        # 읽을 수 없는 파일은 건너뛰되, 한 바퀴를 돌아도 읽은 이미지가 없으면 중단
+        for _ in range(len(self.files)):
+            if self._pos >= len(self.files):
+                if not self.loop:
+                    return None, None
+                self._pos = 0
+            pos = self._pos
+            self._pos += 1
+            frame = cv2.imread(str(self.files[pos]), cv2.IMREAD_COLOR)
+            if frame is not None:
+                break
+            print(f"[경고] 이미지 읽기 실패: {self.files[pos]}")
+        else:
+            # 연속으로 파일 수만큼 실패 = 한 바퀴 동안 읽을 수 있는 이미지 없음
+            raise IOError(f"이미지 디렉터리 {self.path}에서 읽을 수 있는 이미지가 없습니다.")
+        if self.timestamps is not None:
+            return frame, self.timestamps[pos]
+        return frame, pos / self.fps if self.fps > 0 else float(pos)
+
+
+class SyntheticMarkerSource(FrameSource):
+    """움직이는 ArUco 마커를 그린 합성 프레임 생성기. 카메라 없이 부하 테스트에 사용합니다."""
+
+    def __init__(self, num_markers=4, width=config.FRAME_WIDTH, height=config.FRAME_HEIGHT,
+                 fps=0, aruco_type=config.ARUCO_DICT_TYPE, marker_px=None, max_frames=0, prefetch=4):
+        super().__init__(prefetch)
+        self.width = width
+        self.height = height
+        self.fps = fps  # 0이면 속도 제한 없음
+        self.max_frames = max_frames  # 0이면 무한
+        aruco_dict = cv2.aruco.getPredefinedDictionary(config.ARUCO_DICT[aruco_type])
+        self.marker_px = marker_px or max(32, min(width, height) // 5)
+        self.markers = [
+            cv2.aruco.generateImageMarker(aruco_dict, i, self.marker_px) for i in range(num_markers)
+        ]
+        self.background = np.full((height, width, 3), 200, dtype=np.uint8)
+        self._count = 0
+        self._last_time = None
+
+    def _marker_origins(self, index):
+        """index번째 프레임에서 각 마커 이미지의 좌상단 픽셀 좌표 목록."""
+        n = len(self.markers)
+        margin = self.marker_px // 2 + 10
+        origins = []
+        for i in range(n):
+            phase = index * 0.03 + i * 2 * np.pi / max(n, 1)
+            cx = int(self.width / 2 + (self.width / 2 - margin - self.marker_px / 2) * np.cos(phase))
+            cy = int(self.height / 2 + (self.height / 2 - margin - self.marker_px / 2) * np.sin(phase))
+            x0 = int(np.clip(cx - self.marker_px // 2, 0, self.width - self.marker_px))
+            y0 = int(np.clip(cy - self.marker_px // 2, 0, self.height - self.marker_px))
+            origins.append((x0, y0))
+        return origins
+
+    def true_corners(self, index):
+        """index번째 프레임(frame_index)의 정답 마커 코너를 detectMarkers와 같은 형태로 반환합니다.
+
+        반환값: (corners, ids). 코너 순서는 좌상, 우상, 우하, 좌하이며, 픽셀 중심이 정수
+        좌표인 OpenCV 규약에 따라 마커 경계는 픽셀 가장자리(-0.5)에 놓입니다.
+        """
+        corners = []
+        for x0, y0 in self._marker_origins(index):
+            x1, y1 = x0 + self.marker_px, y0 + self.marker_px
+            corners.append(np.array([[[x0, y0], [x1, y0], [x1, y1], [x0, y1]]], dtype=np.float32) - 0.5)
+        return corners, np.arange(len(corners), dtype=np.int32).reshape(-1, 1)
+
+    def _read_frame(self):
+        if self.max_frames and self._count >= self.max_frames:
+            return None, None
+        if self.fps > 0 and self._last_time is not None:
+            sleep_time = self._last_time + 1.0 / self.fps - time.perf_counter()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+        self._last_time = time.perf_counter()
+
+        frame = self.background.copy()
+        for marker, (x0, y0) in zip(self.markers, self._marker_origins(self._count)):
+            # 마커 주변에 흰 여백(quiet zone) 확보
+            pad = self.marker_px // 8
+            cv2.rectangle(frame, (max(x0 - pad, 0), max(y0 - pad, 0)),
+                          (min(x0 + self.marker_px + pad, self.width - 1),
+                           min(y0 + self.marker_px + pad, self.height - 1)), (255, 255, 255), -1)
+            frame[y0:y0 + self.marker_px, x0:x0 + self.marker_px] = marker[:, :, None]
+        self._count += 1
+        return frame, time.time()
+
+
+class ReplaySource(FrameSource):
+    """녹화본(동영상 파일 또는 이미지 디렉터리)을 원래 타이밍대로 재생합니다.
+
+    speed=2.0 이면 두 배 속도, speed=0 이면 타이밍 없이 최대 속도로 재생합니다.
+    재생 중 timestamp는 현재 시각으로 바뀌어 실시간 소스처럼 동작합니다.
+    """
+
+    def __init__(self, path, speed=1.0, loop=False, prefetch=8):
+        super().__init__(prefetch)
+        path = Path(path)
+        if path.is_dir():
+            self.inner = ImageDirectorySource(path, loop=loop, prefetch=0)
+        else:
+            self.inner = VideoFileSource(path, loop=loop, prefetch=0)
+        self.speed = speed
+        self._origin = None  # (녹화 시각, 재생 시작 시각)
+
+    def _read_frame(self):
+        frame, media_ts = self.inner._read_frame()
+        if frame is None:
+            return None, None
+        now = time.perf_counter()
+        if self._origin is None or media_ts < self._origin[0]:  # 처음 또는 반복 재생 시 기준 재설정
+            self._origin = (media_ts, now)
+        elif self.speed > 0:
+            due = self._origin[1] + (media_ts - self._origin[0]) / self.speed
+            if due > now:
+                time.sleep(due - now)
+        return frame, time.time()
+
+    def _close(self):
+        self.inner.release()
+
+
+def open_source(spec, width=config.FRAME_WIDTH, height=config.FRAME_HEIGHT, fps=config.FRAME_RATE,
+                buffer_size=config.CAMERA_BUFFERSIZE, loop=False, prefetch=None):
+    """소스 지정 문자열(또는 카메라 인덱스)로 프레임 소스를 생성하고 프리페치를 시작합니다."""
+    kwargs = {} if prefetch is None else {"prefetch": prefetch}
+    if isinstance(spec, int):
+        return CameraSource(spec, width, height, fps, buffer_size, **kwargs).start()
+
+    spec = str(spec)
+    kind, sep, arg = spec.partition(":")
+    if not sep:
+        kind, arg = "", spec
+
+    if kind == "synthetic" or spec == "synthetic":
+        if kind and not arg.isdigit():
+            raise IOError(f"합성 소스의 마커 수가 잘못되었습니다: {spec}")
+        num = int(arg) if kind else 4
+        return SyntheticMarkerSource(num, width or config.FRAME_WIDTH, height or config.FRAME_HEIGHT,
+                                     **kwargs).start()
+    if kind == "replay":
+        return ReplaySource(arg, loop=loop, **kwargs).start()
+    if kind in ("file", "video"):
+        return VideoFileSource(arg, loop=loop, **kwargs).start()
+    if kind == "dir":
+        return ImageDirectorySource(arg, fps=fps or config.FRAME_RATE, loop=loop, **kwargs).start()
+    if kind in ("camera", "v4l2"):
+        device = int(arg) if arg.isdigit() else arg
+        return CameraSource(device, width, height, fps, buffer_size, **kwargs).start()
+
+    # 접두어가 없으면 형태로 추론
+    if arg.isdigit():
+        return CameraSource(int(arg), width, height, fps, buffer_size, **kwargs).start()
+    if arg.startswith("/dev/video"):
+        return CameraSource(arg, width, height, fps, buffer_size, **kwargs).start()
+    path = Path(arg)
+    if path.is_dir():
+        return ImageDirectorySource(path, fps=fps or config.FRAME_RATE, loop=loop, **kwargs).start()
+    if path.suffix.lower() in VIDEO_EXTENSIONS or path.is_file():
+        return VideoFileSource(path, loop=loop, **kwargs).start()
+    raise IOError(f"알 수 없는 프레임 소스: {spec}")
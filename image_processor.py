@@ -3,6 +3,7 @@ import numpy as np
 from datetime import datetime
 from pathlib import Path
 import config  # 설정값 사용
+from pose_protocol import MARKER_DTYPE
 
 
 def decode_frame(frame_data):
@@ -99,14 +100,165 @@ def _to_rot(rvec):
     return rx, ry, rz
 
 
+_detector_cache = {}  # 프로세스별 ArucoDetector 캐시 (aruco 타입 -> detector)
+_detector_params = {}  # DetectorParameters 기본값을 덮어쓸 속성 (detector_tuner 프로파일)
+
+
+def make_detector_parameters(overrides=None):
+    """기본 DetectorParameters에 overrides(속성 이름 -> 값)를 적용하여 반환합니다."""
+    parameters = cv2.aruco.DetectorParameters()
+    for name, value in (overrides or {}).items():
+        setattr(parameters, name, value)
+    return parameters
+
+
+def load_detector_profile(filename):
+    """detector_tuner.py가 저장한 프로파일을 로드하여 이후 생성되는 detector에 적용합니다."""
+    import yaml
+
+    with open(filename, "r") as f:
+        profile = yaml.safe_load(f) or {}
+    _detector_params.clear()
+    _detector_params.update(profile.get("parameters", {}))
+    _detector_cache.clear()
+    return dict(_detector_params)
+
+
+def create_aruco_detector(aruco_type_str=config.ARUCO_DICT_TYPE):
+    """로드된 프로파일 파라미터로 새 ArucoDetector를 생성합니다 (스레드별 detector 용)."""
+    aruco_dict = cv2.aruco.getPredefinedDictionary(config.ARUCO_DICT[aruco_type_str])
+    return cv2.aruco.ArucoDetector(aruco_dict, make_detector_parameters(_detector_params))
+
+
+def get_aruco_detector(aruco_type_str=config.ARUCO_DICT_TYPE):
+    """ArUco 타입별 ArucoDetector를 한 번만 생성하여 재사용합니다."""
+    detector = _detector_cache.get(aruco_type_str)
+    if detector is None:
+        detector = create_aruco_detector(aruco_type_str)
+        _detector_cache[aruco_type_str] = detector
+    return detector
+
+
+def build_undistort_maps(K, D, size):
+    """왜곡 보정 맵과 새 카메라 매트릭스를 미리 계산합니다. size는 (w, h)입니다.
+
+    매 프레임 cv2.undistort를 호출하는 대신 cv2.remap에 사용합니다.
+    """
+    w, h = size
+    new_K, _ = cv2.getOptimalNewCameraMatrix(K, D, (w, h), alpha=0, newImgSize=(w, h))
+    map1, map2 = cv2.initUndistortRectifyMap(K, D, None, new_K, (w, h), cv2.CV_16SC2)
+    return map1, map2, new_K
+
+
+def marker_object_points(marker_length):
+    """마커 중심 기준 네 꼭지점의 3D 좌표 (좌상, 우상, 우하, 좌하)."""
+    return np.array(
+        [
+            [-marker_length / 2, marker_length / 2, 0],  # 좌상
+            [marker_length / 2, marker_length / 2, 0],  # 우상
+            [marker_length / 2, -marker_length / 2, 0],  # 우하
+            [-marker_length / 2, -marker_length / 2, 0],  # 좌하
+        ],
+        dtype=np.float32,
+    )
+
+
+def estimate_poses(
+    frame,
+    K,
+    D,
+    aruco_type_str=config.ARUCO_DICT_TYPE,
+    marker_length=config.ARUCO_MARKER_LENGTH,
+    detector=None,
+):
+    """그리기 없이 마커를 감지하고 포즈를 MARKER_DTYPE 구조체 배열로 반환합니다.
+
+    왜곡 보정된 영상 대신 원본 영상과 D를 그대로 solvePnP에 사용하므로 프레임 전체를
+    remap 할 필요가 없습니다. detector를 주면 캐시된 detector 대신 사용합니다.
+    반환값: corners, ids, poses
+    """
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    detector = detector or get_aruco_detector(aruco_type_str)
+    corners, ids, _ = detector.detectMarkers(gray)
+    if ids is None or len(ids) == 0 or K is None:
+        return corners, ids, np.empty(0, dtype=MARKER_DTYPE)
+    return corners, ids, poses_from_corners(corners, ids, K, D, marker_length)
+
+
+def poses_from_corners(corners, ids, K, D, marker_length=config.ARUCO_MARKER_LENGTH):
+    """detectMarkers 형태의 코너/ID로 solvePnP를 수행하여 MARKER_DTYPE 구조체 배열을 반환합니다."""
+    ids = np.asarray(ids).reshape(-1)  # OpenCV 버전에 따라 (N, 1) 또는 (N,)
+    obj_points = marker_object_points(marker_length)
+    poses = np.zeros(len(ids), dtype=MARKER_DTYPE)
+    n = 0
+    for i, corner in enumerate(corners):
+        img_points = corner[0].astype(np.float32)
+        try:
+            success, rvec, tvec = cv2.solvePnP(
+                obj_points, img_points, K, D, flags=cv2.SOLVEPNP_IPPE_SQUARE
+            )
+            if not success:
+                continue
+            projected, _ = cv2.projectPoints(obj_points, rvec, tvec, K, D)
+        except cv2.error as e:
+            print(f"[오류] ID {ids[i]} solvePnP 계산 실패: {e}")
+            continue
+        residual = projected.reshape(-1, 2) - img_points
+        poses[n] = (
+            ids[i],
+            tvec.ravel(),
+            rvec.ravel(),
+            np.linalg.norm(tvec),
+            np.sqrt(np.mean(np.sum(residual**2, axis=1))),
+        )
+        n += 1
+    return poses[:n]
+
+
+def poses_from_info(detected_info):
+    """detect_aruco의 감지 정보 리스트를 MARKER_DTYPE 구조체 배열로 변환합니다."""
+    poses = np.zeros(len(detected_info), dtype=MARKER_DTYPE)
+    for i, info in enumerate(detected_info):
+        poses[i] = (info["id"], info["tvec_m"], info["rvec_rad"], info["distance"], info["reproj_error"])
+    return poses
+
+
+class Undistorter:
+    """해상도별로 왜곡 보정 맵을 한 번만 계산해 두고 cv2.remap으로 보정합니다."""
+
+    def __init__(self, K, D, maps=None, frame_size=None):
+        self.K = K
+        self.D = D
+        self._maps = {}  # (w, h) -> (map1, map2, new_K)
+        if maps is not None and frame_size is not None:
+            self._maps[tuple(frame_size)] = maps
+
+    def __call__(self, frame):
+        """보정된 프레임과 새 카메라 매트릭스를 반환합니다."""
+        h, w = frame.shape[:2]
+        maps = self._maps.get((w, h))
+        if maps is None:
+            maps = build_undistort_maps(self.K, self.D, (w, h))
+            self._maps[(w, h)] = maps
+        map1, map2, new_K = maps
+        return cv2.remap(frame, map1, map2, cv2.INTER_LINEAR), new_K
+
+
 def detect_aruco(
     frame,
     K=None,
     D=None,
     aruco_type_str=config.ARUCO_DICT_TYPE,
     marker_length=config.ARUCO_MARKER_LENGTH,
+    draw=True,
+    verbose=True,
+    detector=None,
 ):
-    """프레임에서 ArUco 마커를 감지하고 위치/자세 추정 결과를 그립니다."""
+    """프레임에서 ArUco 마커를 감지하고 위치/자세 추정 결과를 그립니다.
+
+    draw=False 이면 프레임에 그리지 않고, verbose=False 이면 감지 정보를 출력하지 않습니다.
+    detector를 주면 캐시된 detector 대신 사용합니다 (스레드별 detector 등).
+    """
     if frame is None:
         return None
 
@@ -115,29 +267,21 @@ def detect_aruco(
         print(f"[오류] 지원하지 않는 ArUco 타입: {aruco_type_str}")
         return frame
 
-    aruco_dict = cv2.aruco.getPredefinedDictionary(config.ARUCO_DICT[aruco_type_str])
-    parameters = cv2.aruco.DetectorParameters()
-    detector = cv2.aruco.ArucoDetector(aruco_dict, parameters)
+    detector = detector or get_aruco_detector(aruco_type_str)
     corners, ids, rejected = detector.detectMarkers(gray)
 
     detected_info = []  # 감지된 마커 정보 저장 리스트
 
     if ids is not None and len(ids) > 0:
         # 감지된 마커 그리기
-        cv2.aruco.drawDetectedMarkers(frame, corners, ids)
+        if draw:
+            cv2.aruco.drawDetectedMarkers(frame, corners, ids)
+        ids = np.asarray(ids).reshape(-1)  # OpenCV 버전에 따라 (N, 1) 또는 (N,)
 
         # 카메라 파라미터가 있으면 위치/자세 추정
         if K is not None and D is not None:
             # 마커 3D 좌표 정의 (중심 기준)
-            obj_points = np.array(
-                [
-                    [-marker_length / 2, marker_length / 2, 0],  # 좌상
-                    [marker_length / 2, marker_length / 2, 0],  # 우상
-                    [marker_length / 2, -marker_length / 2, 0],  # 우하
-                    [-marker_length / 2, -marker_length / 2, 0],  # 좌하
-                ],
-                dtype=np.float32,
-            )
+            obj_points = marker_object_points(marker_length)
 
             for i, corner in enumerate(corners):
                 img_points = corner[0].astype(np.float32)
@@ -150,7 +294,8 @@ def detect_aruco(
 
                     if success:
                         # 좌표축 그리기
-                        cv2.drawFrameAxes(frame, K, D, rvec, tvec, marker_length * 0.5)
+                        if draw:
+                            cv2.drawFrameAxes(frame, K, D, rvec, tvec, marker_length * 0.5)
 
                         # 정보 추출 및 텍스트 표시
                         center, topLeft, _, _, _ = _corner_points(corner)
@@ -158,21 +303,32 @@ def detect_aruco(
                         rx, ry, rz = _to_rot(rvec)
                         distance = np.linalg.norm(tvec)
 
-                        marker_id = ids[i][0]
+                        marker_id = ids[i]
                         # info = {
                         #     "id": marker_id,
                         #     "tvec": (x, y, z),
                         #     "rvec_deg": (rx, ry, rz),
                         #     "distance": distance,
                         # }
+                        # 재투영 오차 (픽셀 RMS)
+                        projected, _ = cv2.projectPoints(obj_points, rvec, tvec, K, D)
+                        residual = projected.reshape(-1, 2) - img_points
+                        reproj_error = np.sqrt(np.mean(np.sum(residual**2, axis=1)))
                         info = {
                             "id": marker_id.item(),
                             "tvec": (x, y, z),
                             "rvec_deg": (rx, ry, rz),
                             "distance": distance.item(),
+                            "reproj_error": reproj_error.item(),
+                            # 반올림하지 않은 원본 값 (포즈 게시용)
+                            "tvec_m": tuple(tvec.ravel().tolist()),
+                            "rvec_rad": tuple(rvec.ravel().tolist()),
                         }
                         detected_info.append(info)
-                        print(f"[INFO] {info}")  # 콘솔 출력 대신 반환
+                        if verbose:
+                            print(f"[INFO] {info}")  # 콘솔 출력 대신 반환
+                        if not draw:
+                            continue
 
                         # id_text = f"ID: {marker_id}"
                         pos_text = f"Pos:({x:.2f},{y:.2f},{z:.2f})m"
@@ -207,11 +363,19 @@ def detect_aruco(
                         )
 
                 except cv2.error as e:
-                    print(f"[오류] ID {ids[i][0]} solvePnP 계산 실패: {e}")
+                    print(f"[오류] ID {ids[i]} solvePnP 계산 실패: {e}")
                     continue  # 다음 마커 처리
     return frame, detected_info  # 처리된 프레임과 감지 정보 리스트 반환
 
 
+def snapshot_path(directory="captures"):
+    """스냅샷 저장 경로를 만들고 반환합니다."""
+    filename = datetime.now().strftime("capture_%Y%m%d_%H%M%S.jpg")
+    save_path = Path(directory)
+    save_path.mkdir(parents=True, exist_ok=True)
+    return save_path / filename
+
+
 def display_frame(frame, window_title="Stream"):
     """프레임을 화면에 표시하고 사용자 입력을 처리합니다."""
     if frame is None or frame.size == 0:
@@ -224,10 +388,7 @@ def display_frame(frame, window_title="Stream"):
     if key == ord("q"):
         return "quit"
     elif key == ord("s"):
-        filename = datetime.now().strftime("capture_%Y%m%d_%H%M%S.jpg")
-        save_path = Path("captures")
-        save_path.mkdir(parents=True, exist_ok=True)
-        full_path = save_path / filename
+        full_path = snapshot_path()
         try:
             cv2.imwrite(str(full_path), frame)
             print(f"[정보] 이미지 저장됨: {full_path}")
@@ -0,0 +1,292 @@
+# motion_gate.py
+"""움직임 기반 전송 (서버: MotionGate, 클라이언트: FrameCompositor).
+
+정지 장면에서 매 프레임을 JPEG로 인코딩해 보내지 않도록, 서버는 프레임을 축소한
+그레이 영상으로 변화 점수(임계값을 넘게 변한 픽셀 비율)를 계산합니다.
+
+    변화 없음: 전송 생략, KEEPALIVE 간격마다 작은 keep-alive 패킷만 전송
+    변화 있음: full  - 전체 JPEG 프레임
+               tiles - 키프레임 대비 변한 타일을 감싸는 사각형 하나만 JPEG로 인코딩해 전송
+               roi   - 설정한 관심 영역(ROI)만 전송 (변화도 ROI 안에서만 계산)
+
+타일/ROI 패킷은 직전 패킷이 아닌 마지막 키프레임(전체 프레임) 대비 누적 변화를
+담으므로 중간 패킷이 손실되어도 오류가 누적되지 않습니다. 키프레임은 변화 영역이
+넓거나 KEYFRAME 간격이 지나면 다시 전송됩니다. 타일마다 JPEG 헤더/허프만 테이블이 붙으면
+전체 프레임보다 커지므로 변한 타일의 합집합 사각형을 한 번에 인코딩하고, 그래도 마지막
+키프레임보다 크면 전체 프레임을 대신 보냅니다.
+
+모든 페이로드는 기존 UDP 헤더/청크/END 프로토콜로 그대로 전송됩니다. 전체 프레임은
+기존과 같은 JPEG 바이트이고, 타일과 keep-alive 페이로드는 매직 바이트로 구분합니다.
+    keep-alive: magic b"MGK1", key_seq u16
+    타일:       magic b"MGT1", key_seq u16, width u16, height u16, count u16
+                + count x (x u16, y u16, w u16, h u16, size u32, JPEG 바이트)
+key_seq는 키프레임이 전송된 UDP 프레임 시퀀스 번호입니다.
+"""
+import struct
+import time
+
+import cv2
+import numpy as np
+
+import config
+from image_processor import decode_frame
+
+KEEPALIVE_MAGIC = b"MGK1"
+TILE_MAGIC = b"MGT1"
+KEEPALIVE_HEADER = struct.Struct("<4sH")
+TILE_HEADER = struct.Struct("<4sHHHH")
+TILE_ENTRY = struct.Struct("<HHHHI")
+
+MOTION_MODES = ("off", "full", "tiles", "roi")
+
+
+def parse_roi(text):
+    """"x,y,w,h" 문자열을 (x, y, w, h) 튜플로 변환합니다."""
+    try:
+        values = tuple(int(v) for v in text.split(","))
+    except ValueError:
+        values = ()
+    if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+        raise ValueError(f"ROI는 x,y,w,h 형식의 정수이고 w, h는 양수여야 합니다: {text}")
+    return values
+
+
+def clip_roi(roi, width, height):
+    """ROI (x, y, w, h)를 width x height 프레임 안으로 자릅니다. 겹치는 영역이 없으면 ValueError."""
+    x, y, w, h = roi
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + w, width), min(y + h, height)
+    if x1 <= x0 or y1 <= y0:
+        raise ValueError(f"ROI {tuple(roi)}가 프레임({width}x{height}) 밖에 있습니다.")
+    return x0, y0, x1 - x0, y1 - y0
+
+
+class MotionGate:
+    """프레임 변화량에 따라 전송할 페이로드를 결정하는 서버 측 게이트.
+
+    encode(frame)으로 (종류, 페이로드)를 받아 전송한 뒤, 전송에 성공하면
+    sent(frame_seq)를 호출해야 기준 영상이 갱신됩니다.
+    종류: "full", "tiles", "keepalive", 또는 전송하지 않을 때 "skip" (페이로드 None)
+    """
+
+    def __init__(self, mode="tiles", quality=config.JPEG_QUALITY, threshold=config.MOTION_THRESHOLD,
+                 pixel_threshold=config.MOTION_PIXEL_THRESHOLD, downscale=config.MOTION_DOWNSCALE,
+                 tile_size=config.MOTION_TILE_SIZE, max_tile_fraction=config.MOTION_MAX_TILE_FRACTION,
+                 keepalive_interval=config.MOTION_KEEPALIVE_INTERVAL,
+                 keyframe_interval=config.MOTION_KEYFRAME_INTERVAL, roi=None):
+        if mode not in MOTION_MODES[1:]:
+            raise ValueError(f"지원하지 않는 움직임 전송 모드: {mode}")
+        if mode == "roi" and roi is None:
+            raise ValueError("roi 모드에는 ROI(x, y, w, h)가 필요합니다.")
+        if tile_size % downscale:
+            raise ValueError(f"타일 크기({tile_size})는 축소 비율({downscale})의 배수여야 합니다.")
+        self.mode = mode
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.threshold = threshold
+        self.pixel_threshold = pixel_threshold
+        self.downscale = downscale
+        self.tile_size = tile_size
+        self.max_tile_fraction = max_tile_fraction
+        self.keepalive_interval = keepalive_interval
+        self.keyframe_interval = keyframe_interval
+        self.roi = roi
+
+        self.key_seq = None
+        self._key_small = None  # 키프레임 축소 영상 (타일 선택 기준)
+        self._last_small = None  # 마지막 전송 축소 영상 (변화 판단 기준)
+        self._last_key_time = 0.0
+        self._key_bytes = None  # 마지막 키프레임 페이로드 크기 (타일/전체 선택 기준)
+        self._last_send_time = 0.0
+        self._pending = None
+        self.last_score = 0.0
+        self.stats = {"full": 0, "tiles": 0, "keepalive": 0, "skip": 0, "tile_count": 0, "bytes": 0}
+
+    def _small(self, frame):
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        h, w = gray.shape
+        return cv2.resize(gray, (w // self.downscale, h // self.downscale), interpolation=cv2.INTER_AREA)
+
+    def _roi_slices(self, shape, small=False):
+        """프레임 안으로 자른 ROI를 (행, 열) 슬라이스로 반환합니다. small이면 축소 영상 기준."""
+        s = self.downscale
+        height, width = shape[:2]
+        if small:
+            height, width = height * s, width * s
+        x, y, w, h = clip_roi(self.roi, width, height)
+        if small:
+            return slice(y // s, -(-(y + h) // s)), slice(x // s, -(-(x + w) // s))
+        return slice(y, y + h), slice(x, x + w)
+
+    def _changed(self, small, reference):
+        return cv2.absdiff(small, reference) > self.pixel_threshold
+
+    def change_score(self, small):
+        """마지막 전송 영상 대비 변화 점수 (변한 축소 픽셀 비율, ROI 모드는 ROI 안에서만)."""
+        if self._last_small is None or self._last_small.shape != small.shape:
+            return 1.0
+        mask = self._changed(small, self._last_small)
+        if self.mode == "roi":
+            mask = mask[self._roi_slices(small.shape, small=True)]
+        return float(mask.mean()) if mask.size else 0.0
+
+    def _changed_tiles(self, small):
+        """키프레임 대비 변한 타일의 (x, y, w, h) 목록 (원본 좌표)."""
+        mask = self._changed(small, self._key_small)
+        sh, sw = mask.shape
+        ts = self.tile_size // self.downscale
+        gh, gw = -(-sh // ts), -(-sw // ts)
+        padded = np.zeros((gh * ts, gw * ts), dtype=bool)
+        padded[:sh, :sw] = mask
+        tiles = padded.reshape(gh, ts, gw, ts).any(axis=(1, 3))
+        return tiles, [(int(tx), int(ty)) for ty, tx in zip(*np.nonzero(tiles))]
+
+    def _tile_rects(self, frame, tile_indices, grid_shape):
+        """변한 타일을 모두 감싸는 사각형 하나를 [(x, y, w, h)]로 반환합니다 (원본 좌표)."""
+        if not tile_indices:
+            return []
+        height, width = frame.shape[:2]
+        gh, gw = grid_shape
+        txs = [tx for tx, _ in tile_indices]
+        tys = [ty for _, ty in tile_indices]
+        x, y = min(txs) * self.tile_size, min(tys) * self.tile_size
+        # 마지막 행/열 타일은 축소 과정에서 잘린 가장자리까지 포함
+        x1 = width if max(txs) == gw - 1 else min(width, (max(txs) + 1) * self.tile_size)
+        y1 = height if max(tys) == gh - 1 else min(height, (max(tys) + 1) * self.tile_size)
+        return [(x, y, x1 - x, y1 - y)]
+
+    def _encode_tiles(self, frame, rects):
+        height, width = frame.shape[:2]
+        parts = [TILE_HEADER.pack(TILE_MAGIC, self.key_seq, width, height, len(rects))]
+        for x, y, w, h in rects:
+            ok, encoded = cv2.imencode(".jpg", frame[y:y + h, x:x + w], self.encode_params)
+            if not ok:
+                return None
+            data = encoded.tobytes()
+            parts.append(TILE_ENTRY.pack(x, y, w, h, len(data)))
+            parts.append(data)
+        return b"".join(parts)
+
+    def _encode_full(self, frame):
+        ok, encoded = cv2.imencode(".jpg", frame, self.encode_params)
+        return encoded.tobytes() if ok else None
+
+    def encode(self, frame, now=None):
+        """프레임 하나를 평가하여 (종류, 페이로드)를 반환합니다."""
+        now = time.time() if now is None else now
+        small = self._small(frame)
+        self.last_score = self.change_score(small)
+        self._pending = None
+
+        need_key = (
+            self._key_small is None
+            or self._key_small.shape != small.shape
+            or now - self._last_key_time >= self.keyframe_interval
+        )
+        if not need_key and self.last_score < self.threshold:
+            if now - self._last_send_time >= self.keepalive_interval:
+                kind, payload = "keepalive", KEEPALIVE_HEADER.pack(KEEPALIVE_MAGIC, self.key_seq)
+            else:
+                kind, payload = "skip", None
+        elif need_key or self.mode == "full":
+            kind, payload = "full", self._encode_full(frame)
+        else:
+            if self.mode == "roi":
+                rows, cols = self._roi_slices(frame.shape)
+                rects = [(cols.start, rows.start, cols.stop - cols.start, rows.stop - rows.start)]
+                fraction, tile_count = 0.0, 1
+            else:
+                tiles, indices = self._changed_tiles(small)
+                rects = self._tile_rects(frame, indices, tiles.shape)
+                fraction = sum(w * h for _, _, w, h in rects) / (frame.shape[0] * frame.shape[1])
+                tile_count = len(indices)
+            if fraction > self.max_tile_fraction:
+                # 변화 영역이 넓으면 타일보다 전체 프레임이 효율적
+                kind, payload = "full", self._encode_full(frame)
+            else:
+                # rects가 비면 직전 전송 대비 변했지만 키프레임과는 같아진 경우: 키프레임 그대로 표시
+                kind, payload = "tiles", self._encode_tiles(frame, rects)
+                if payload is not None and self._key_bytes is not None and len(payload) >= self._key_bytes:
+                    # 전체 프레임보다 크면 키프레임을 새로 보내는 편이 작고 누적 기준도 갱신됨
+                    kind, payload = "full", self._encode_full(frame)
+                else:
+                    self.stats["tile_count"] += tile_count
+
+        self.stats[kind] += 1
+        if payload is not None:
+            self._pending = (kind, small, now, len(payload))
+            self.stats["bytes"] += len(payload)
+        return kind, payload
+
+    def sent(self, frame_seq):
+        """encode()가 반환한 페이로드가 frame_seq로 전송되었음을 기록합니다."""
+        if self._pending is None:
+            return
+        kind, small, now, size = self._pending
+        self._pending = None
+        self._last_send_time = now
+        if kind == "full":
+            self.key_seq = frame_seq
+            self._key_small = small
+            self._key_bytes = size
+            self._last_key_time = now
+        if kind != "keepalive":
+            self._last_small = small
+
+
+class FrameCompositor:
+    """MotionGate 페이로드를 수신 측에서 마지막 키프레임에 합성합니다.
+
+    decode(data, frame_seq)는 새로 표시할 프레임을 반환하고, keep-alive이거나 기준
+    키프레임이 없어 합성할 수 없으면 None을 반환합니다. last_kind로 종류를 확인합니다.
+    일반 JPEG 스트림(움직임 게이트 미사용)도 그대로 처리합니다.
+    """
+
+    def __init__(self):
+        self.keyframe = None
+        self.key_seq = None
+        self.last_kind = None
+        self.last_keepalive_time = 0.0
+        self.stats = {"full": 0, "tiles": 0, "keepalive": 0, "orphan": 0}
+
+    def decode(self, data, frame_seq=None):
+        magic = bytes(data[:4])
+        if magic == KEEPALIVE_MAGIC:
+            self.last_kind = "keepalive"
+            self.last_keepalive_time = time.time()
+            self.stats["keepalive"] += 1
+            return None
+        if magic == TILE_MAGIC:
+            self.last_kind = "tiles"
+            return self._composite(data)
+
+        frame = decode_frame(data)
+        self.last_kind = "full"
+        if frame is not None:
+            self.keyframe = frame
+            self.key_seq = frame_seq
+            self.stats["full"] += 1
+        return frame
+
+    def _composite(self, data):
+        if len(data) < TILE_HEADER.size:
+            return None
+        _, key_seq, width, height, count = TILE_HEADER.unpack_from(data)
+        key = self.keyframe
+        if key is None or key_seq != self.key_seq or key.shape[:2] != (height, width):
+            # 기준 키프레임 손실: 다음 키프레임까지 대기
+            self.stats["orphan"] += 1
+            return None
+        frame = key.copy()
+        offset = TILE_HEADER.size
+        for _ in range(count):
+            if len(data) < offset + TILE_ENTRY.size:
+                return None
+            x, y, w, h, size = TILE_ENTRY.unpack_from(data, offset)
+            offset += TILE_ENTRY.size
+            tile = decode_frame(data[offset:offset + size])
+            offset += size
+            if tile is None or tile.shape[:2] != (h, w) or y + h > height or x + w > width:
+                return None
+            frame[y:y + h, x:x + w] = tile
+        self.stats["tiles"] += 1
+        return frame
@@ -0,0 +1,249 @@
+# multi_camera.py
+"""여러 USB 카메라를 한 프로세스에서 처리하는 다중 카메라 클라이언트.
+
+카메라마다 캡처 스레드가 최신 프레임 슬롯 하나를 채우고, 공유 감지 워커 스레드 풀이
+카메라를 라운드 로빈으로 돌며 프레임을 가져갑니다. 카메라별 동시 처리 프레임 수를
+max_inflight로 제한하므로 빠른 카메라가 워커를 독점하지 못합니다. 처리되기 전에 새
+프레임으로 대체된 프레임은 드롭으로 집계됩니다.
+
+OpenCV의 감지/solvePnP/remap은 GIL을 해제하므로 워커 스레드 수만큼 코어를 사용하며,
+캘리브레이션과 OpenCV는 프로세스당 한 번만 로드됩니다.
+"""
+import math
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import config
+from frame_sources import CameraSource, open_source
+from image_processor import create_aruco_detector, detect_aruco
+
+
+class CameraStats:
+    """카메라별 처리 통계. 구간 FPS/지연은 snapshot() 호출 사이의 값입니다."""
+
+    def __init__(self):
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0  # 처리 전에 새 프레임으로 대체된 프레임 수
+        self._window_start = time.time()
+        self._window_frames = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+
+    def record(self, latency):
+        self.processed += 1
+        self._window_frames += 1
+        self._latency_sum += latency
+        self._latency_max = max(self._latency_max, latency)
+
+    def snapshot(self, now=None):
+        now = time.time() if now is None else now
+        elapsed = max(now - self._window_start, 1e-6)
+        frames = self._window_frames
+        result = {
+            "fps": frames / elapsed,
+            "latency_ms": self._latency_sum / frames * 1000 if frames else 0.0,
+            "latency_max_ms": self._latency_max * 1000,
+            "captured": self.captured,
+            "processed": self.processed,
+            "dropped": self.dropped,
+        }
+        self._window_start = now
+        self._window_frames = 0
+        self._latency_sum = 0.0
+        self._latency_max = 0.0
+        return result
+
+
+class CameraChannel:
+    """카메라 하나의 소스, 캘리브레이션, 최신 프레임 슬롯과 통계."""
+
+    def __init__(self, camera_id, spec, K=None, D=None, undistorter=None):
+        self.camera_id = camera_id
+        self.spec = spec
+        self.K = K
+        self.D = D
+        self.undistorter = undistorter
+        # 캡처 스레드에서 직접 read() 하므로 소스 자체의 프리페치 스레드는 사용하지 않음
+        self.source = open_source(spec, width=None, height=None, fps=None, buffer_size=None, prefetch=0)
+        if isinstance(self.source, CameraSource):
+            self.source.cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+        self.pending = None  # (frame_index, capture_time, frame)
+        self.inflight = 0
+        self.finished = False
+        self.latest = None  # 마지막으로 처리된 (주석이 그려진) 프레임
+        self.stats = CameraStats()
+
+
+class MultiCameraClient:
+    """N개 카메라의 프레임을 공유 워커 풀에서 공정하게 처리합니다.
+
+    cameras: (소스 지정, K, D, Undistorter) 목록. K/D/Undistorter는 None일 수 있습니다.
+    on_result(camera_id, frame_index, capture_time, frame, detected_info)는 처리된 프레임마다
+    호출되며, 여러 워커에서 동시에 호출되지 않도록 직렬화됩니다.
+    """
+
+    def __init__(self, cameras, workers=None, aruco_type=config.ARUCO_DICT_TYPE,
+                 marker_length=config.ARUCO_MARKER_LENGTH, detect=True,
+                 max_inflight=config.MULTI_CAMERA_MAX_INFLIGHT, on_result=None):
+        self.channels = []
+        try:
+            for camera_id, (spec, K, D, undistorter) in enumerate(cameras):
+                self.channels.append(CameraChannel(camera_id, spec, K, D, undistorter))
+        except IOError:
+            for ch in self.channels:
+                ch.source.release()
+            raise
+        self.workers = workers or os.cpu_count() or 1
+        self.aruco_type = aruco_type
+        self.marker_length = marker_length
+        self.detect = detect
+        self.max_inflight = max_inflight
+        self.on_result = on_result
+        self._cond = threading.Condition()
+        self._result_lock = threading.Lock()
+        self._next_channel = 0
+        self._running = False
+        self._threads = []
+
+    @property
+    def finished(self):
+        """모든 소스가 끝났고 처리 중인 프레임이 없으면 True."""
+        with self._cond:
+            return all(ch.finished and ch.pending is None and ch.inflight == 0 for ch in self.channels)
+
+    def start(self):
+        self._running = True
+        for ch in self.channels:
+            self._threads.append(threading.Thread(target=self._capture_loop, args=(ch,), daemon=True))
+        for _ in range(self.workers):
+            self._threads.append(threading.Thread(target=self._worker_loop, daemon=True))
+        for t in self._threads:
+            t.start()
+        print(f"다중 카메라 처리 시작: 카메라 {len(self.channels)}대, 감지 워커 {self.workers}개")
+        return self
+
+    def _capture_loop(self, ch):
+        source = ch.source
+        while self._running:
+            try:
+                frame = source.read()
+            except Exception as e:
+                print(f"[오류] 카메라 {ch.camera_id} ({ch.spec}) 프레임 읽기 실패: {e}")
+                break
+            if frame is None:
+                if source.finished:
+                    break
+                time.sleep(0.01)
+                continue
+            # 파일 기반 소스의 timestamp는 재생 시각이므로 현재 시각 사용
+            capture_time = source.last_timestamp if source.live else time.time()
+            with self._cond:
+                if ch.pending is not None:
+                    ch.stats.dropped += 1
+                ch.pending = (source.frame_index, capture_time, frame)
+                ch.stats.captured += 1
+                self._cond.notify()
+            if not source.live:
+                # 파일 소스는 슬롯이 빌 때까지 기다려 프레임을 버리지 않음
+                with self._cond:
+                    while self._running and ch.pending is not None:
+                        self._cond.wait(0.1)
+        with self._cond:
+            ch.finished = True
+            self._cond.notify_all()
+
+    def _next_job(self):
+        """라운드 로빈으로 대기 프레임이 있고 처리 한도에 여유가 있는 카메라를 고릅니다. (cond 보유 상태)"""
+        n = len(self.channels)
+        for k in range(n):
+            ch = self.channels[(self._next_channel + k) % n]
+            if ch.pending is not None and ch.inflight < self.max_inflight:
+                self._next_channel = (ch.camera_id + 1) % n
+                job, ch.pending = ch.pending, None
+                ch.inflight += 1
+                return ch, job
+        return None
+
+    def _worker_loop(self):
+        # ArucoDetector는 워커 스레드마다 따로 생성
+        detector = create_aruco_detector(self.aruco_type) if self.detect else None
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None and self._running:
+                    self._cond.wait(0.1)
+                    job = self._next_job()
+                if job is None:
+                    return
+                self._cond.notify_all()  # 비워진 슬롯을 기다리는 파일 소스 캡처 스레드
+            ch, (frame_index, capture_time, frame) = job
+            try:
+                processed, detected_info = self._process(ch, frame, detector)
+            except Exception as e:
+                print(f"[오류] 카메라 {ch.camera_id} 프레임 처리 실패: {e}")
+                processed, detected_info = None, []
+            with self._cond:
+                ch.inflight -= 1
+                if processed is not None:
+                    ch.stats.record(time.time() - capture_time)
+                    ch.latest = processed
+                self._cond.notify()
+            if processed is not None and self.on_result is not None:
+                with self._result_lock:
+                    self.on_result(ch.camera_id, frame_index, capture_time, processed, detected_info)
+
+    def _process(self, ch, frame, detector):
+        new_K = ch.K
+        if ch.undistorter is not None:
+            frame, new_K = ch.undistorter(frame)
+        detected_info = []
+        if self.detect:
+            frame, detected_info = detect_aruco(
+                frame, new_K, ch.D, self.aruco_type, self.marker_length, verbose=False, detector=detector
+            )
+        return frame, detected_info
+
+    def mosaic(self, tile_width=config.FRAME_WIDTH // 2, tile_height=config.FRAME_HEIGHT // 2):
+        """카메라별 최신 처리 프레임을 격자로 배치한 모니터링 영상을 반환합니다."""
+        n = len(self.channels)
+        cols = math.ceil(math.sqrt(n))
+        rows = math.ceil(n / cols)
+        canvas = np.zeros((rows * tile_height, cols * tile_width, 3), dtype=np.uint8)
+        for ch in self.channels:
+            frame = ch.latest
+            if frame is None:
+                continue
+            if frame.ndim == 2:
+                frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+            r, c = divmod(ch.camera_id, cols)
+            y, x = r * tile_height, c * tile_width
+            canvas[y:y + tile_height, x:x + tile_width] = cv2.resize(frame, (tile_width, tile_height))
+            cv2.putText(canvas, f"CAM {ch.camera_id} ({ch.spec})", (x + 5, y + 15),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 255, 255), 1)
+        return canvas
+
+    def report(self):
+        """카메라별 구간 FPS/지연/드롭 통계를 출력하고 반환합니다."""
+        now = time.time()
+        with self._cond:
+            stats = [ch.stats.snapshot(now) for ch in self.channels]
+        for ch, s in zip(self.channels, stats):
+            print(f"[정보] 카메라 {ch.camera_id} ({ch.spec}): {s['fps']:.1f} FPS, "
+                  f"지연 {s['latency_ms']:.1f} ms (최대 {s['latency_max_ms']:.1f}), "
+                  f"처리 {s['processed']}/{s['captured']}, 드롭 {s['dropped']}")
+        return stats
+
+    def close(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads = []
+        for ch in self.channels:
+            ch.source.release()
@@ -0,0 +1,98 @@
+# pose_protocol.py
+"""마커 포즈 패킷 형식.
+
+영상 대신 프레임별 ArUco 포즈만 전송하기 위한 고정 레이아웃 바이너리 레코드입니다.
+
+    헤더 (20 바이트, little-endian):
+        magic      4s   b"APOS"
+        version    u8
+        stream_id  u8   카메라/스트림 구분
+        count      u16  마커 수
+        frame_id   u32  프레임 번호
+        timestamp  f64  캡처 시각 (time.time())
+    마커 레코드 x count (MARKER_DTYPE, 각 36 바이트):
+        id i32, tvec f32[3] (m), rvec f32[3] (rad), distance f32 (m), reproj_error f32 (px)
+
+마커 레코드는 NumPy 구조체 배열로 그대로 복호화되므로 추가 변환 비용이 없습니다.
+"""
+import socket
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"APOS"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHId")
+MARKER_DTYPE = np.dtype([
+    ("id", "<i4"),
+    ("tvec", "<f4", (3,)),
+    ("rvec", "<f4", (3,)),
+    ("distance", "<f4"),
+    ("reproj_error", "<f4"),
+])
+# UDP 데이터그램 하나에 담을 수 있는 최대 마커 수
+MAX_MARKERS = (65507 - HEADER.size) // MARKER_DTYPE.itemsize
+
+
+def encode_poses(frame_id, timestamp, poses, stream_id=0):
+    """프레임 하나의 포즈 배열(MARKER_DTYPE)을 바이트 패킷으로 인코딩합니다."""
+    poses = np.asarray(poses, dtype=MARKER_DTYPE)[:MAX_MARKERS]
+    header = HEADER.pack(MAGIC, VERSION, stream_id & 0xFF, len(poses), frame_id & 0xFFFFFFFF, timestamp)
+    return header + poses.tobytes()
+
+
+def decode_poses(data):
+    """패킷을 (stream_id, frame_id, timestamp, poses)로 디코딩합니다. 형식이 맞지 않으면 None."""
+    if len(data) < HEADER.size:
+        return None
+    magic, version, stream_id, count, frame_id, timestamp = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        return None
+    if len(data) < HEADER.size + count * MARKER_DTYPE.itemsize:
+        return None
+    poses = np.frombuffer(data, dtype=MARKER_DTYPE, count=count, offset=HEADER.size)
+    return stream_id, frame_id, timestamp, poses
+
+
+class PoseReceiver:
+    """UDP 포즈 패킷을 수신하여 NumPy 배열로 디코딩합니다."""
+
+    def __init__(self, host_ip, port, timeout=0.5):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind((host_ip, port))
+        self.sock.settimeout(timeout)
+        print(f"포즈 수신기 바인딩 완료: {host_ip}:{port}")
+
+    def receive(self):
+        """(stream_id, frame_id, timestamp, poses) 또는 타임아웃/잘못된 패킷이면 None."""
+        try:
+            data = self.sock.recv(65535)
+        except socket.timeout:
+            return None
+        return decode_poses(data)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+            self.sock = None
+            print("포즈 수신기 소켓 닫힘.")
+
+
+# 테스트용 (직접 실행 시): 수신한 포즈 출력
+if __name__ == '__main__':
+    import config
+    receiver = PoseReceiver(config.CLIENT_IP, config.POSE_PORT)
+    try:
+        while True:
+            packet = receiver.receive()
+            if packet is None:
+                continue
+            stream_id, frame_id, timestamp, poses = packet
+            latency_ms = (time.time() - timestamp) * 1000
+            print(f"[스트림 {stream_id}] 프레임 {frame_id} ({latency_ms:.1f} ms): "
+                  + ", ".join(f"ID {p['id']} {np.round(p['tvec'], 3)}" for p in poses))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
@@ -0,0 +1,349 @@
+# pose_publisher.py
+"""다중 구독자 포즈 게시 채널.
+
+PosePublisher는 프레임별 감지 결과를 pose_protocol 형식의 바이너리 레코드로 한 번만
+인코딩하여 모든 구독자에게 UDP 또는 Unix 도메인 소켓으로 전송합니다.
+
+UDP 구독 프로토콜 (제어 포트, 데이터그램):
+    b"SUB"   구독 등록/갱신. SUBSCRIPTION_TIMEOUT 안에 갱신하지 않으면 만료
+    b"UNSUB" 구독 해제
+Unix 소켓은 SOCK_SEQPACKET 연결 하나가 구독 하나입니다 (연결 = 등록, 종료 = 해제).
+데이터그램 Unix 소켓은 수신 큐가 커널 max_dgram_qlen(기본 10개)으로 제한되어 대부분의
+레코드를 잃기 때문에, 메시지 경계를 유지하면서 송신 버퍼 크기만큼 버퍼링되는
+SEQPACKET을 사용합니다. 송신 버퍼가 가득 차면 블로킹하지 않고 버리며, 구독자별
+드롭 수를 집계하고 주기적으로 경고합니다.
+
+PoseSubscriber는 등록과 주기적 갱신을 자동으로 처리하고, 수신 패킷을
+NumPy 구조체 배열(MARKER_DTYPE)로 바로 디코딩합니다.
+"""
+import os
+import select
+import socket
+import stat
+import threading
+import time
+
+import numpy as np
+
+import config
+from pose_protocol import MARKER_DTYPE, decode_poses, encode_poses
+
+SUBSCRIBE = b"SUB"
+UNSUBSCRIBE = b"UNSUB"
+SUBSCRIPTION_TIMEOUT = 10.0  # 초
+SUBSCRIPTION_RENEW = 3.0  # 구독자 갱신 주기 (초)
+SOCKET_BUFFER = 1 << 20
+DROP_REPORT_INTERVAL = 5.0  # 드롭 경고 출력 간격 (초)
+
+
+class PosePublisher:
+    """포즈 레코드를 여러 구독자에게 게시합니다.
+
+    control_port: UDP 구독 요청을 받을 포트 (None이면 UDP 구독 비활성)
+    unix_path: Unix 도메인 소켓 경로 (None이면 비활성)
+    static_targets: 구독 요청 없이 항상 전송할 (ip, port) 목록
+    """
+
+    def __init__(self, control_port=config.POSE_CONTROL_PORT, unix_path=None, static_targets=(),
+                 host_ip=config.CLIENT_IP):
+        if unix_path:
+            # 소켓을 만들기 전에 확인하여 실패 시 열린 소켓이 남지 않도록 함
+            self._remove_stale_socket(unix_path)
+        self.static_targets = [(socket.AF_INET, tuple(t)) for t in static_targets]
+        self.subscribers = {}  # (family, addr) -> 마지막 갱신 시각
+        self._targets = tuple(self.static_targets)  # publish()에서 사용하는 불변 스냅샷
+        self._lock = threading.Lock()
+        self._running = True
+        self._threads = []
+        self.published = 0
+        self.dropped = 0  # 송신 버퍼가 가득 차 버린 패킷 수
+        self.drops_by_target = {}  # 구독자 주소 -> 버린 패킷 수
+        self._last_drop_report = time.time()
+        self._reported_drops = 0
+
+        self.udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+        self.udp_sock.setblocking(False)
+        if control_port is not None:
+            self.udp_sock.bind((host_ip, control_port))
+            self._start_control(self.udp_sock, socket.AF_INET)
+
+        self.unix_path = unix_path
+        self.unix_sock = None
+        self.unix_clients = []  # 연결된 SOCK_SEQPACKET 구독자 소켓
+        if unix_path:
+            self.unix_sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            self.unix_sock.bind(unix_path)
+            self.unix_sock.listen(16)
+            t = threading.Thread(target=self._unix_loop, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+        print(f"포즈 게시자 시작: UDP 제어 포트 {control_port}, Unix {unix_path}, 고정 대상 {list(static_targets)}")
+
+    @staticmethod
+    def _remove_stale_socket(path):
+        """경로의 Unix 소켓이 비정상 종료된 게시자가 남긴 것일 때만 삭제합니다.
+
+        다른 게시자가 사용 중이거나 소켓 파일이 아니면 FileExistsError를 발생시킵니다.
+        """
+        try:
+            mode = os.stat(path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise FileExistsError(f"{path}가 이미 있으며 Unix 소켓이 아닙니다.")
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        try:
+            probe.connect(path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # 수신 대기 중인 게시자 없음: 남은 소켓 파일 정리
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            return
+        except OSError as e:
+            raise FileExistsError(f"Unix 소켓 {path}의 사용 여부를 확인할 수 없습니다: {e}") from e
+        finally:
+            probe.close()
+        raise FileExistsError(f"Unix 소켓 {path}를 다른 포즈 게시자가 사용 중입니다.")
+
+    def _start_control(self, sock, family):
+        t = threading.Thread(target=self._control_loop, args=(sock, family), daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _unix_loop(self):
+        """Unix 소켓 구독자 연결을 받고, 연결이 끊긴 구독자를 정리합니다."""
+        while self._running:
+            with self._lock:
+                watched = [self.unix_sock] + self.unix_clients
+            try:
+                readable, _, _ = select.select(watched, [], [], 1.0)
+            except (OSError, ValueError):
+                continue  # publish()에서 끊긴 구독자를 닫은 경우: 목록을 다시 읽음
+            for sock in readable:
+                if sock is self.unix_sock:
+                    try:
+                        conn, _ = self.unix_sock.accept()
+                    except OSError:
+                        continue
+                    conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER)
+                    conn.setblocking(False)
+                    with self._lock:
+                        self.unix_clients.append(conn)
+                    print(f"[정보] 포즈 구독 등록 (Unix): fd {conn.fileno()}")
+                else:
+                    # 구독자는 데이터를 보내지 않으므로 읽기 가능 = 종료(또는 UNSUB)
+                    try:
+                        msg = sock.recv(64)
+                    except OSError:
+                        msg = b""
+                    if not msg or msg.startswith(UNSUBSCRIBE):
+                        self._remove_unix_client(sock)
+            self._expire()
+
+    def _remove_unix_client(self, conn):
+        with self._lock:
+            if conn not in self.unix_clients:
+                return
+            self.unix_clients.remove(conn)
+            self._targets = tuple(t for t in self._targets if t[1] is not conn)
+        print(f"[정보] 포즈 구독 해제 (Unix): fd {conn.fileno()}")
+        conn.close()
+
+    def _control_loop(self, sock, family):
+        """구독 요청을 처리하고 만료된 구독자를 정리합니다."""
+        while self._running:
+            readable, _, _ = select.select([sock], [], [], 1.0)
+            if readable:
+                try:
+                    msg, addr = sock.recvfrom(64)
+                except OSError:
+                    continue
+                key = (family, addr)
+                with self._lock:
+                    if msg.startswith(UNSUBSCRIBE):
+                        if self.subscribers.pop(key, None) is not None:
+                            print(f"[정보] 포즈 구독 해제: {addr}")
+                    elif msg.startswith(SUBSCRIBE):
+                        if key not in self.subscribers:
+                            print(f"[정보] 포즈 구독 등록: {addr}")
+                        self.subscribers[key] = time.time()
+            self._expire()
+
+    def _expire(self):
+        now = time.time()
+        with self._lock:
+            for key in [k for k, t in self.subscribers.items() if now - t > SUBSCRIPTION_TIMEOUT]:
+                print(f"[정보] 포즈 구독 만료: {key[1]}")
+                del self.subscribers[key]
+            self._targets = (tuple(self.static_targets) + tuple(self.subscribers)
+                             + tuple((socket.AF_UNIX, conn) for conn in self.unix_clients))
+
+    def publish(self, frame_id, timestamp, poses, stream_id=0):
+        """프레임 하나의 포즈를 모든 구독자에게 전송합니다. 블로킹하지 않습니다."""
+        packet = encode_poses(frame_id, timestamp, poses, stream_id)
+        for family, target in self._targets:
+            try:
+                if family == socket.AF_UNIX:
+                    target.send(packet)
+                else:
+                    self.udp_sock.sendto(packet, target)
+            except (BlockingIOError, ConnectionRefusedError):
+                self._count_drop(target)
+            except (BrokenPipeError, ConnectionResetError):
+                if family == socket.AF_UNIX:
+                    self._remove_unix_client(target)
+                else:
+                    self._count_drop(target)
+            except OSError as e:
+                self._count_drop(target)
+                print(f"[경고] 포즈 전송 실패 ({target}): {e}")
+        self.published += 1
+        self._report_drops()
+
+    def _count_drop(self, target):
+        key = f"unix:fd{target.fileno()}" if isinstance(target, socket.socket) else target
+        self.drops_by_target[key] = self.drops_by_target.get(key, 0) + 1
+        self.dropped += 1
+
+    def _report_drops(self):
+        now = time.time()
+        if now - self._last_drop_report < DROP_REPORT_INTERVAL:
+            return
+        new_drops = self.dropped - self._reported_drops
+        if new_drops:
+            print(f"[경고] 포즈 구독자가 따라오지 못해 {DROP_REPORT_INTERVAL:.0f}초 동안 {new_drops}개 드롭: "
+                  f"{self.drops_by_target}")
+        self._reported_drops = self.dropped
+        self._last_drop_report = now
+
+    def close(self):
+        self._running = False
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self.udp_sock.close()
+        if self.unix_sock is not None:
+            for conn in self.unix_clients:
+                conn.close()
+            self.unix_clients = []
+            self.unix_sock.close()
+            try:
+                os.unlink(self.unix_path)
+            except OSError:
+                pass
+        print(f"포즈 게시자 종료: 게시 {self.published}, 드롭 {self.dropped} {self.drops_by_target or ''}")
+
+
+class PoseSubscriber:
+    """PosePublisher에 구독하여 포즈를 NumPy 배열로 받는 클라이언트.
+
+    publisher: UDP는 (ip, port), Unix 소켓은 경로 문자열
+    """
+
+    def __init__(self, publisher=(config.SERVER_IP, config.POSE_CONTROL_PORT), timeout=0.5):
+        self.publisher = publisher
+        self.unix = isinstance(publisher, str)
+        if self.unix:
+            # 연결 자체가 구독이므로 SUB 갱신이 필요 없음
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+            self.sock.connect(publisher)
+        else:
+            self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER)
+            self.sock.bind(("", 0))
+        self.timeout = timeout
+        self.sock.settimeout(timeout)
+        self._last_renew = 0.0
+        self._renew()
+
+    def _renew(self):
+        if self.unix:
+            return
+        now = time.time()
+        if now - self._last_renew >= SUBSCRIPTION_RENEW:
+            try:
+                self.sock.sendto(SUBSCRIBE, self.publisher)
+            except OSError as e:
+                print(f"[경고] 포즈 구독 요청 실패 ({self.publisher}): {e}")
+            self._last_renew = now
+
+    def receive(self):
+        """다음 패킷을 (stream_id, frame_id, timestamp, poses)로 반환합니다. 타임아웃이면 None."""
+        self._renew()
+        try:
+            data = self.sock.recv(65535)
+        except socket.timeout:
+            return None
+        if not data:
+            raise ConnectionError(f"포즈 게시자 연결이 종료되었습니다: {self.publisher}")
+        return decode_poses(data)
+
+    def poll(self, max_packets=1024):
+        """대기 중인 패킷을 블로킹 없이 모두 읽어 하나의 배열로 합칩니다.
+
+        반환값: stream_ids, frame_ids, timestamps (마커별로 펼친 배열), poses (MARKER_DTYPE)
+        """
+        self._renew()
+        packets = []
+        self.sock.setblocking(False)
+        try:
+            for _ in range(max_packets):
+                try:
+                    data = self.sock.recv(65535)
+                except (BlockingIOError, InterruptedError):
+                    break
+                if not data:
+                    break  # Unix 연결 종료
+                packet = decode_poses(data)
+                if packet is not None:
+                    packets.append(packet)
+        finally:
+            self.sock.settimeout(self.timeout)
+
+        if not packets:
+            empty = np.empty(0)
+            return empty.astype(np.uint8), empty.astype(np.uint32), empty, np.empty(0, dtype=MARKER_DTYPE)
+        counts = [len(p[3]) for p in packets]
+        stream_ids = np.repeat(np.array([p[0] for p in packets], dtype=np.uint8), counts)
+        frame_ids = np.repeat(np.array([p[1] for p in packets], dtype=np.uint32), counts)
+        timestamps = np.repeat(np.array([p[2] for p in packets], dtype=np.float64), counts)
+        return stream_ids, frame_ids, timestamps, np.concatenate([p[3] for p in packets])
+
+    def close(self):
+        try:
+            if self.unix:
+                self.sock.send(UNSUBSCRIBE)
+            else:
+                self.sock.sendto(UNSUBSCRIBE, self.publisher)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+# 테스트용 구독자 (직접 실행 시): python pose_publisher.py [ip:port | unix 경로]
+if __name__ == '__main__':
+    import sys
+
+    target = sys.argv[1] if len(sys.argv) > 1 else f"{config.SERVER_IP}:{config.POSE_CONTROL_PORT}"
+    if ":" in target:
+        ip, port = target.rsplit(":", 1)
+        target = (ip, int(port))
+    subscriber = PoseSubscriber(target)
+    print(f"포즈 구독 시작: {target}")
+    try:
+        while True:
+            packet = subscriber.receive()
+            if packet is None:
+                continue
+            stream_id, frame_id, timestamp, poses = packet
+            latency_ms = (time.time() - timestamp) * 1000
+            print(f"[스트림 {stream_id}] 프레임 {frame_id} ({latency_ms:.1f} ms): "
+                  + ", ".join(f"ID {p['id']} {np.round(p['tvec'], 3)}" for p in poses))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        subscriber.close()
@@ -0,0 +1,155 @@
+# pose_tracker.py
+"""지연 보정 포즈 추적.
+
+PoseTracker는 마커 ID별 상태(위치/속도/마지막 캡처 시각)를 미리 할당한 NumPy 배열에
+두고, 한 프레임의 모든 마커를 등속도 alpha-beta 필터로 한 번에(벡터화) 갱신합니다.
+predict(now)는 각 마커를 캡처 시각에서 현재 시각까지 외삽한 포즈를 MARKER_DTYPE
+배열로 반환합니다. TrackedPoseOutput은 이 예측값을 감지 속도와 무관한 일정 주기로
+포즈 게시 채널에 내보내므로, 감지가 느리거나 지연되어도 포즈 스트림은 부드럽고
+현재 시각에 맞춰집니다.
+
+상태 벡터는 [tvec(3), rvec(3)] 입니다. 회전 벡터는 각도가 pi 부근에서 같은 회전의
+다른 표현(r - 2*pi*r/|r|)으로 뒤집힐 수 있으므로 예측값에 가까운 표현을 사용합니다.
+"""
+import threading
+import time
+
+import numpy as np
+
+import config
+from pose_protocol import MARKER_DTYPE
+
+
+class PoseTracker:
+    """마커 ID별 등속도 alpha-beta 필터 (ID로 직접 인덱싱하는 배열 상태)."""
+
+    def __init__(self, max_id=config.TRACKER_MAX_ID, alpha=config.TRACKER_ALPHA, beta=config.TRACKER_BETA,
+                 max_age=config.TRACKER_MAX_AGE, max_extrapolation=config.TRACKER_MAX_EXTRAPOLATION):
+        n = max_id + 1
+        self.alpha = alpha
+        self.beta = beta
+        self.max_age = max_age
+        self.max_extrapolation = max_extrapolation
+        self.pos = np.zeros((n, 6))  # tvec(m), rvec(rad)
+        self.vel = np.zeros((n, 6))  # 초당 변화량
+        self.stamp = np.zeros(n)  # 마지막 측정의 캡처 시각
+        self.reproj_error = np.zeros(n, dtype=np.float32)
+        self.active = np.zeros(n, dtype=bool)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unwrap_rvec(measured, predicted):
+        """measured 회전 벡터 중 반대 표현이 예측값에 더 가까운 것을 제자리에서 바꿉니다."""
+        theta = np.linalg.norm(measured, axis=1, keepdims=True)
+        alt = measured - 2 * np.pi * measured / np.maximum(theta, 1e-9)
+        use_alt = (theta[:, 0] > 0) & (
+            np.linalg.norm(alt - predicted, axis=1) < np.linalg.norm(measured - predicted, axis=1)
+        )
+        measured[use_alt] = alt[use_alt]
+
+    def update(self, poses, timestamp):
+        """한 프레임의 측정 포즈(MARKER_DTYPE)를 캡처 시각 timestamp로 반영합니다."""
+        poses = np.asarray(poses, dtype=MARKER_DTYPE)
+        ids = poses["id"].astype(np.int64)
+        keep = (ids >= 0) & (ids < len(self.active))
+        if not keep.all():
+            poses, ids = poses[keep], ids[keep]
+        if len(ids) == 0:
+            return
+        # 같은 프레임에 같은 ID가 여러 번 감지되면 첫 번째만 사용
+        ids, first = np.unique(ids, return_index=True)
+        poses = poses[first]
+        measured = np.concatenate([poses["tvec"], poses["rvec"]], axis=1).astype(np.float64)
+
+        with self._lock:
+            dt = timestamp - self.stamp[ids]
+            active = self.active[ids]
+            # 순서가 뒤바뀐(더 오래된) 측정은 무시
+            current = ~active | (dt > 0)
+            if not current.all():
+                ids, measured, dt, active = ids[current], measured[current], dt[current], active[current]
+            fresh = ~active | (dt > self.max_age)  # 새 마커 또는 오래 사라졌던 마커는 재초기화
+            dt = np.where(fresh, 1.0, dt)
+
+            predicted = self.pos[ids] + self.vel[ids] * dt[:, None]
+            self._unwrap_rvec(measured[:, 3:], predicted[:, 3:])
+            residual = measured - predicted
+            pos = predicted + self.alpha * residual
+            vel = self.vel[ids] + (self.beta / dt)[:, None] * residual
+            pos[fresh] = measured[fresh]
+            vel[fresh] = 0.0
+
+            self.pos[ids] = pos
+            self.vel[ids] = vel
+            self.stamp[ids] = timestamp
+            self.reproj_error[ids] = poses["reproj_error"][current]
+            self.active[ids] = True
+
+    def predict(self, now=None):
+        """활성 마커를 now 시각으로 외삽한 포즈를 MARKER_DTYPE 배열로 반환합니다."""
+        now = time.time() if now is None else now
+        with self._lock:
+            ids = np.flatnonzero(self.active)
+            age = now - self.stamp[ids]
+            expired = age > self.max_age
+            if expired.any():
+                self.active[ids[expired]] = False
+                ids, age = ids[~expired], age[~expired]
+            horizon = np.clip(age, 0.0, self.max_extrapolation)
+            state = self.pos[ids] + self.vel[ids] * horizon[:, None]
+            reproj_error = self.reproj_error[ids]
+
+        poses = np.empty(len(ids), dtype=MARKER_DTYPE)
+        poses["id"] = ids
+        poses["tvec"] = state[:, :3]
+        poses["rvec"] = state[:, 3:]
+        poses["distance"] = np.linalg.norm(state[:, :3], axis=1)
+        poses["reproj_error"] = reproj_error
+        return poses
+
+    def reset(self):
+        with self._lock:
+            self.active[:] = False
+
+
+class TrackedPoseOutput:
+    """스트림별 PoseTracker의 예측 포즈를 일정 주기로 포즈 게시자에 내보냅니다.
+
+    publish()는 PosePublisher와 같은 형태로 호출되지만 감지 결과를 캡처 시각과 함께
+    트래커에 넣기만 하며, 게시는 별도 스레드가 rate(Hz) 주기로 timestamp=현재 시각으로
+    수행합니다. close()는 감싼 publisher도 닫습니다.
+    """
+
+    def __init__(self, publisher, rate=config.TRACKER_OUTPUT_HZ, num_streams=1, **tracker_kwargs):
+        self.publisher = publisher
+        self.interval = 1.0 / rate
+        self.trackers = [PoseTracker(**tracker_kwargs) for _ in range(num_streams)]
+        self.frame_id = 0
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        print(f"포즈 추적 출력 시작: {rate} Hz, 스트림 {num_streams}개")
+
+    def publish(self, frame_id, timestamp, poses, stream_id=0):
+        """감지 결과를 트래커에 반영합니다. frame_id는 출력 번호와 무관하므로 사용하지 않습니다."""
+        self.trackers[stream_id].update(poses, timestamp)
+
+    def _run(self):
+        next_time = time.perf_counter()
+        while self._running:
+            now = time.time()
+            for stream_id, tracker in enumerate(self.trackers):
+                self.publisher.publish(self.frame_id, now, tracker.predict(now), stream_id)
+            self.frame_id += 1
+
+            next_time += self.interval
+            sleep_time = next_time - time.perf_counter()
+            if sleep_time > 0:
+                time.sleep(sleep_time)
+            else:
+                next_time = time.perf_counter()
+
+    def close(self):
+        self._running = False
+        self._thread.join(timeout=2.0)
+        self.publisher.close()
@@ -0,0 +1,191 @@
+# recorder.py
+"""처리 루프를 막지 않는 백그라운드 녹화기.
+
+주석이 그려진 프레임은 구간(segment) 단위 동영상 파일로, 감지 결과는 JSON Lines
+로그로 저장합니다. 처리 루프는 submit()으로 큐에 넣기만 하고, 인코딩과 디스크 쓰기는
+각각의 워커 스레드가 담당합니다. 디스크가 따라오지 못해 큐가 가득 차면 프레임을
+버리고 dropped_frames 카운터만 증가시킵니다 (절대 블로킹하지 않음).
+"""
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import cv2
+
+import config
+
+
+class Recorder:
+    def __init__(self, output_dir, fps=config.FRAME_RATE, segment_seconds=config.RECORD_SEGMENT_SECONDS,
+                 segment_mb=config.RECORD_SEGMENT_MB, codec=config.RECORD_CODEC,
+                 queue_size=config.RECORD_QUEUE_SIZE, log_flush_interval=1.0, log_batch=256):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.fps = fps if fps > 0 else 30
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = int(segment_mb * 1024 * 1024) if segment_mb else 0
+        self.fourcc = cv2.VideoWriter_fourcc(*codec)
+        self.extension = ".avi" if codec in ("MJPG", "XVID") else ".mp4"
+        self.log_flush_interval = log_flush_interval
+        self.log_batch = log_batch
+
+        self.frames_written = 0
+        self.dropped_frames = 0
+        self.dropped_records = 0
+        self.segments = []
+        self.video_failed = False  # 녹화 파일 열기 실패 시 동영상 녹화 중단 (로그는 계속)
+
+        self._frame_queue = queue.Queue(maxsize=queue_size)
+        self._log_queue = queue.Queue(maxsize=queue_size * 16)
+        self._writer = None
+        self._segment_path = None
+        self._segment_start = 0.0
+        self._segment_frames = 0
+        self._frame_size = None
+
+        session = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.session = session
+        self.log_path = self.output_dir / f"detections_{session}.jsonl"
+        self._threads = [
+            threading.Thread(target=self._video_loop, daemon=True),
+            threading.Thread(target=self._log_loop, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        print(f"녹화 시작: {self.output_dir} (구간 {segment_seconds}초/{segment_mb}MB, 로그 {self.log_path.name})")
+
+    def submit(self, frame, timestamp=None, frame_id=None, detections=None):
+        """프레임과 감지 결과를 녹화 대기열에 넣습니다. 가득 차면 버리고 False를 반환합니다."""
+        timestamp = time.time() if timestamp is None else timestamp
+        accepted = True
+        if frame is not None and not self.video_failed:
+            try:
+                self._frame_queue.put_nowait((frame, timestamp, frame_id))
+            except queue.Full:
+                self.dropped_frames += 1
+                accepted = False
+        if detections:
+            record = {"timestamp": timestamp, "frame_id": frame_id, "detections": detections}
+            try:
+                self._log_queue.put_nowait(record)
+            except queue.Full:
+                self.dropped_records += 1
+        return accepted
+
+    # ----- 동영상 -----
+    def _open_segment(self, frame_size):
+        if self._writer is not None:
+            self._writer.release()
+        index = len(self.segments)
+        self._segment_path = self.output_dir / f"record_{self.session}_{index:04d}{self.extension}"
+        self._writer = cv2.VideoWriter(str(self._segment_path), self.fourcc, self.fps, frame_size)
+        if not self._writer.isOpened():
+            print(f"[오류] 녹화 파일을 열 수 없습니다: {self._segment_path}. "
+                  "동영상 녹화를 중단합니다 (감지 로그는 계속 기록).")
+            self._writer = None
+            self.video_failed = True
+            return
+        self._frame_size = frame_size
+        self._segment_start = time.time()
+        self._segment_frames = 0
+        self.segments.append(self._segment_path)
+        print(f"[정보] 녹화 구간 시작: {self._segment_path.name}")
+
+    def _needs_rotation(self, frame_size):
+        if self._writer is None or frame_size != self._frame_size:
+            return True
+        if self.segment_seconds and time.time() - self._segment_start >= self.segment_seconds:
+            return True
+        # 파일 크기 확인은 비용이 있으므로 일정 프레임마다만 수행
+        if self.segment_bytes and self._segment_frames % 30 == 0:
+            try:
+                return self._segment_path.stat().st_size >= self.segment_bytes
+            except OSError:
+                return False
+        return False
+
+    def _video_loop(self):
+        while True:
+            item = self._frame_queue.get()
+            if item is None:
+                break
+            if self.video_failed:
+                continue  # 대기열에 남은 프레임은 버림
+            frame, _, _ = item
+            h, w = frame.shape[:2]
+            if self._needs_rotation((w, h)):
+                self._open_segment((w, h))
+            if self._writer is None:
+                continue
+            self._writer.write(frame)
+            self._segment_frames += 1
+            self.frames_written += 1
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+    # ----- 감지 로그 -----
+    def _log_loop(self):
+        batch = []
+        last_flush = time.time()
+        with open(self.log_path, "a", buffering=1 << 16) as f:
+            while True:
+                try:
+                    record = self._log_queue.get(timeout=self.log_flush_interval)
+                except queue.Empty:
+                    record = False  # 타임아웃: 주기적 flush만 수행
+                if record is None:
+                    break
+                if record:
+                    batch.append(json.dumps(record, ensure_ascii=False))
+                now = time.time()
+                if batch and (len(batch) >= self.log_batch or now - last_flush >= self.log_flush_interval):
+                    f.write("\n".join(batch) + "\n")
+                    batch.clear()
+                if now - last_flush >= self.log_flush_interval:
+                    f.flush()
+                    last_flush = now
+            if batch:
+                f.write("\n".join(batch) + "\n")
+
+    @staticmethod
+    def _put_stop(q, thread, timeout=5.0):
+        """대기열에 종료 신호를 넣습니다. 워커가 멈춰 자리가 나지 않으면 남은 항목을 버리고 버린 수를 반환합니다."""
+        try:
+            q.put(None, timeout=timeout if thread.is_alive() else 0)
+            return 0
+        except queue.Full:
+            pass
+        dropped = 0
+        while True:
+            try:
+                q.get_nowait()
+                dropped += 1
+            except queue.Empty:
+                break
+        try:
+            q.put_nowait(None)
+        except queue.Full:
+            pass
+        return dropped
+
+    def close(self):
+        """대기 중인 프레임과 로그를 모두 기록한 뒤 종료합니다.
+
+        워커 스레드가 이미 종료되었거나 멈춰 대기열이 비워지지 않으면 남은 항목은 버립니다.
+        """
+        dropped = self._put_stop(self._frame_queue, self._threads[0])
+        if dropped:
+            print(f"[경고] 녹화 스레드가 응답하지 않아 대기 중인 프레임 {dropped}개를 버립니다.")
+            self.dropped_frames += dropped
+        dropped = self._put_stop(self._log_queue, self._threads[1])
+        if dropped:
+            print(f"[경고] 로그 스레드가 응답하지 않아 대기 중인 로그 {dropped}개를 버립니다.")
+            self.dropped_records += dropped
+        for t in self._threads:
+            t.join(timeout=10.0)
+        print(f"녹화 종료: 프레임 {self.frames_written}, 버린 프레임 {self.dropped_frames}, "
+              f"버린 로그 {self.dropped_records}, 구간 {len(self.segments)}")
@@ -1,68 +1,165 @@
 # run_client.py
-import cv2
 import time
+
+_START_TIME = time.perf_counter()  # 콜드 스타트 ~ 첫 포즈 시간 측정 기준
+
 import argparse
-import numpy as np
-from pathlib import Path
 
 import config
-from udp_receiver import UdpReceiver
-from image_processor import decode_frame, undistort_frame, detect_aruco, display_frame
-from calibration_utils import load_calibration_from_yaml
 
-def run_udp_client(use_calibration, calibration_file, detect_aruco_flag, aruco_type, marker_length):
-    """UDP 스트림을 수신하고 처리하는 클라이언트를 실행합니다."""
+# cv2/numpy 등 무거운 모듈은 실행 함수 안에서 import 하여 --help 등의 시작 비용을 줄임
 
-    K, D = None, None
-    new_K = None # 왜곡 보정 후 사용할 K 값
 
-    if use_calibration:
-        try:
-            K, D = load_calibration_from_yaml(calibration_file)
-            new_K = K.copy() # 초기값은 원본 K
-            print(f"카메라 캘리브레이션 로드 완료: {calibration_file}")
-        except FileNotFoundError:
-            print(f"[경고] 캘리브레이션 파일({calibration_file})을 찾을 수 없습니다. 캘리브레이션 없이 진행합니다.")
-            K, D = None, None
-        except Exception as e:
-            print(f"[오류] 캘리브레이션 파일 로드 실패: {e}")
-            K, D = None, None
+def _load_calibration(use_calibration, calibration_file):
+    """캐시된 캘리브레이션을 로드합니다. 반환값: K, D, Undistorter (실패 시 None)"""
+    from calibration_utils import load_calibration_cached
+    from image_processor import Undistorter
+
+    if not use_calibration:
+        return None, None, None
+    try:
+        load_start = time.perf_counter()
+        frame_size = (config.FRAME_WIDTH, config.FRAME_HEIGHT)
+        K, D, maps = load_calibration_cached(calibration_file, frame_size)
+        print(f"카메라 캘리브레이션 로드 완료: {calibration_file} ({(time.perf_counter() - load_start) * 1000:.1f} ms)")
+        return K, D, Undistorter(K, D, maps, frame_size)
+    except FileNotFoundError:
+        print(f"[경고] 캘리브레이션 파일({calibration_file})을 찾을 수 없습니다. 캘리브레이션 없이 진행합니다.")
+    except Exception as e:
+        print(f"[오류] 캘리브레이션 파일 로드 실패: {e}")
+    return None, None, None
+
+
+def _load_detector_profile(profile_file):
+    """detector_tuner.py가 저장한 감지 파라미터 프로파일이 있으면 로드합니다."""
+    import os
+
+    if not profile_file or not os.path.exists(profile_file):
+        return None
+    from image_processor import load_detector_profile
+    try:
+        params = load_detector_profile(profile_file)
+        print(f"감지 파라미터 프로파일 로드 완료: {profile_file} {params}")
+        return params
+    except Exception as e:
+        print(f"[경고] 감지 파라미터 프로파일 로드 실패 ({profile_file}): {e}. 기본값을 사용합니다.")
+        return None
+
+
+def _create_pose_publisher(publish_poses, track_poses=False, num_streams=1):
+    """--publish_poses 사용 시 UDP 제어 포트와 Unix 소켓으로 구독을 받는 포즈 게시자를 생성합니다.
+
+    track_poses=True 이면 감지 결과 대신 현재 시각으로 외삽한 추적 포즈를 일정 주기로 게시하는
+    TrackedPoseOutput으로 감싸서 반환합니다 (publish/close 사용법은 같음).
+    """
+    if not (publish_poses or track_poses):
+        return None
+    from pose_publisher import PosePublisher
+    try:
+        publisher = PosePublisher(config.POSE_CONTROL_PORT, unix_path=config.POSE_UNIX_SOCKET)
+    except OSError as e:
+        print(f"[경고] 포즈 게시자 생성 실패: {e}. 게시 없이 진행합니다.")
+        return None
+    if track_poses:
+        from pose_tracker import TrackedPoseOutput
+        return TrackedPoseOutput(publisher, num_streams=num_streams)
+    return publisher
+
+
+def _create_recorder(record_dir):
+    """--record 사용 시 주석 영상과 감지 로그를 저장하는 백그라운드 녹화기를 생성합니다."""
+    if not record_dir:
+        return None
+    from recorder import Recorder
+    return Recorder(record_dir)
+
+
+def _report_first_pose(detected_info, reported):
+    """처음으로 포즈가 계산된 시점에 시작부터 걸린 시간을 출력합니다."""
+    # detected_info는 dict 목록 또는 MARKER_DTYPE 배열 (배열의 진리값은 모호하므로 길이로 판단)
+    if detected_info is not None and len(detected_info) > 0 and not reported:
+        print(f"[정보] 콜드 스타트 ~ 첫 포즈: {time.perf_counter() - _START_TIME:.3f}초")
+        return True
+    return reported
+
+
+def run_udp_client(use_calibration, calibration_file, detect_aruco_flag, aruco_type, marker_length,
+                   shm_ring_name=None, shm_ring_slots=config.SHM_FRAME_RING_SLOTS, publish_poses=False,
+                   recv_policy=config.RECV_POLICY, display_fps=config.DISPLAY_FPS, record_dir=None,
+                   track_poses=False):
+    """UDP 스트림을 수신하고 처리하는 클라이언트를 실행합니다.
+
+    shm_ring_name을 지정하면 디코딩된 프레임을 공유 메모리 링에 게시하여
+    같은 장비의 다른 프로세스가 복사 없이 사용할 수 있게 합니다.
+    publish_poses=True 이면 감지 결과를 포즈 게시 채널(pose_publisher)로 내보냅니다.
+    track_poses=True 이면 추적 필터로 현재 시각까지 외삽한 포즈를 일정 주기로 게시합니다.
+    """
+    import cv2
+    from udp_receiver import UdpReceiver
+    from frame_display import FrameDisplay
+    from image_processor import detect_aruco, poses_from_info
+    from motion_gate import FrameCompositor
+
+    K, D, undistorter = _load_calibration(use_calibration, calibration_file)
+    new_K = K # 왜곡 보정 후 사용할 K 값
+    first_pose_reported = False
 
     try:
         receiver = UdpReceiver(
             config.CLIENT_IP,
             config.PORT,
             config.CLIENT_RECV_BUFFER,
+            policy=recv_policy,
+            max_frames=config.RECV_MAX_FRAMES,
+            max_bytes=config.RECV_MAX_BYTES,
         )
     except IOError as e:
         print(f"UDP 수신기 초기화 오류: {e}")
         return
+    # 수신기 생성에 실패해도 게시자 소켓이 남지 않도록 수신기 다음에 생성
+    pose_publisher = _create_pose_publisher(publish_poses, track_poses)
+
+    shm_ring = None
+    if shm_ring_name:
+        from shm_frame_ring import ShmFrameRing
+        try:
+            shm_ring = ShmFrameRing(shm_ring_name, config.FRAME_WIDTH, config.FRAME_HEIGHT, slots=shm_ring_slots)
+        except OSError as e:
+            print(f"[경고] 공유 메모리 프레임 링 생성 실패: {e}. 게시 없이 진행합니다.")
 
+    # 서버 움직임 기반 전송(run_server.py --motion)의 타일/keep-alive를 마지막 프레임에 합성
+    compositor = FrameCompositor()
     last_frame = None
     frame_count = 0
     start_time = time.time()
     fps = 0
+    display = FrameDisplay("UDP Stream Client", display_fps)
+    recorder = _create_recorder(record_dir)
     print("UDP 클라이언트 시작. 스트림 수신 대기 중...")
     print("종료: 'q', 저장: 's'")
 
     try:
         while True:
             frame_data = receiver.receive_frame_data()
+            receive_time = time.time()
             processed_frame = None
             detected_info = [] # ArUco 정보 초기화
 
             if frame_data:
-                # 데이터 디코딩
-                frame = decode_frame(frame_data)
+                # 서버가 보낸 캡처 시각 (구버전 서버는 없으므로 수신 시각 사용)
+                capture_time = receiver.last_capture_time or receive_time
+                # 데이터 디코딩 (keep-alive는 None: 장면 변화 없음)
+                frame = compositor.decode(frame_data, receiver.last_frame_seq)
                 if frame is not None:
+                    if shm_ring is not None:
+                        # 원본(디코딩 직후) 프레임을 로컬 소비자에게 게시
+                        shm_ring.publish(frame)
                     last_frame = frame.copy() # 성공적으로 디코딩된 마지막 프레임 저장
 
                     # 왜곡 보정 (캘리브레이션 사용 시)
-                    if use_calibration and K is not None and D is not None:
-                        processed_frame, temp_K = undistort_frame(last_frame, K, D)
-                        # 왜곡 보정 함수가 새 K를 반환하면 업데이트
-                        if temp_K is not None:
-                            new_K = temp_K
+                    if undistorter is not None:
+                        # 미리 계산된 맵으로 보정 (cv2.remap)
+                        processed_frame, new_K = undistorter(last_frame)
                     else:
                         processed_frame = last_frame
                         new_K = K # 캘리브레이션 없으면 new_K도 None 또는 원본 K
@@ -73,6 +170,11 @@ def run_udp_client(use_calibration, calibration_file, detect_aruco_flag, aruco_t
                         processed_frame, detected_info = detect_aruco(
                             processed_frame, new_K, D, aruco_type, marker_length
                         )
+                        first_pose_reported = _report_first_pose(detected_info, first_pose_reported)
+                        if pose_publisher is not None:
+                            pose_publisher.publish(
+                                receiver.last_frame_seq, capture_time, poses_from_info(detected_info)
+                            )
                         # if detected_info: # 감지된 정보가 있을 때만 출력
                         #    print(detected_info)
 
@@ -98,7 +200,10 @@ def run_udp_client(use_calibration, calibration_file, detect_aruco_flag, aruco_t
                     )
 
                     # 화면 표시 및 사용자 입력 처리
-                    result = display_frame(processed_frame, "UDP Stream Client")
+                    if recorder is not None:
+                        recorder.submit(processed_frame, capture_time, receiver.last_frame_seq, detected_info)
+
+                    result = display.show(processed_frame)
                     if result == "quit":
                         break
                 else: # 프레임 디코딩 실패 시
@@ -117,59 +222,103 @@ def run_udp_client(use_calibration, calibration_file, detect_aruco_flag, aruco_t
         print(f"\n[오류] 클라이언트 실행 중 예외 발생: {e}")
     finally:
         print("리소스 정리 중...")
+        print(f"[정보] 수신 통계: {receiver.stats}, 합성 통계: {compositor.stats}")
         receiver.close()
+        display.close()
+        if recorder is not None:
+            recorder.close()
+        if pose_publisher is not None:
+            pose_publisher.close()
+        if shm_ring is not None:
+            shm_ring.close()
         cv2.destroyAllWindows()
         print("클라이언트 종료 완료.")
 
 
+def run_pose_client():
+    """서버 포즈 모드(run_server.py --mode pose)가 보내는 포즈 패킷을 수신하여 출력합니다."""
+    import numpy as np
+    from pose_protocol import PoseReceiver
+
+    receiver = PoseReceiver(config.CLIENT_IP, config.POSE_PORT)
+    first_pose_reported = False
+    print("포즈 클라이언트 시작. 포즈 패킷 수신 대기 중... (종료: Ctrl+C)")
+    try:
+        while True:
+            packet = receiver.receive()
+            if packet is None:
+                continue
+            stream_id, frame_id, timestamp, poses = packet
+            if len(poses) == 0:
+                continue
+            first_pose_reported = _report_first_pose(poses, first_pose_reported)
+            latency_ms = (time.time() - timestamp) * 1000
+            for p in poses:
+                print(f"[INFO] frame {frame_id} id {p['id']} tvec {np.round(p['tvec'], 3)} "
+                      f"rvec {np.round(np.rad2deg(p['rvec']), 1)} dist {p['distance']:.3f} "
+                      f"err {p['reproj_error']:.2f}px latency {latency_ms:.1f}ms")
+    except KeyboardInterrupt:
+        print("\nCtrl+C 감지. 클라이언트 종료 중...")
+    finally:
+        receiver.close()
+
+
 def run_usb_camera(
-    camera_index, use_calibration, calibration_file, detect_aruco_flag, aruco_type, marker_length
+    camera_index, use_calibration, calibration_file, detect_aruco_flag, aruco_type, marker_length,
+    publish_poses=False, display_fps=config.DISPLAY_FPS, record_dir=None, track_poses=False,
 ):
-    """USB 카메라 입력을 처리하고 표시합니다."""
-    K, D = None, None
-    new_K = None
+    """USB 카메라(또는 frame_sources 소스 지정 문자열) 입력을 처리하고 표시합니다."""
+    import cv2
+    from frame_sources import CameraSource, open_source
+    from frame_display import FrameDisplay
+    from image_processor import detect_aruco, poses_from_info
 
-    if use_calibration:
-        try:
-            K, D = load_calibration_from_yaml(calibration_file)
-            new_K = K.copy()
-            print(f"카메라 캘리브레이션 로드 완료: {calibration_file}")
-        except FileNotFoundError:
-             print(f"[경고] 캘리브레이션 파일({calibration_file})을 찾을 수 없습니다. 캘리브레이션 없이 진행합니다.")
-             K, D = None, None
-        except Exception as e:
-            print(f"[경고] 캘리브레이션 로드 실패: {e}")
-            K, D = None, None
-
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
-        print(f"[오류] USB 카메라 인덱스 {camera_index}를 열 수 없습니다.")
+    K, D, undistorter = _load_calibration(use_calibration, calibration_file)
+    new_K = K
+    first_pose_reported = False
+
+    try:
+        # 카메라 설정 (해상도 등)은 장치 기본값 사용
+        source = open_source(camera_index, width=None, height=None, fps=None, buffer_size=None)
+    except IOError as e:
+        print(f"[오류] USB 카메라 인덱스 {camera_index}를 열 수 없습니다: {e}")
         return
 
-    # 카메라 설정 (해상도 등)
-    # cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.FRAME_WIDTH)
-    # cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.FRAME_HEIGHT)
-    # 자동 초점 끄기 시도 (선택적)
-    cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+    if isinstance(source, CameraSource):
+        # 자동 초점 끄기 시도 (선택적)
+        source.cap.set(cv2.CAP_PROP_AUTOFOCUS, 0)
+        window_title = f"USB Camera Feed (Index: {camera_index})"
+    else:
+        window_title = f"Frame Source ({camera_index})"
 
+    pose_publisher = _create_pose_publisher(publish_poses, track_poses)
+    display = FrameDisplay(window_title, display_fps)
+    recorder = _create_recorder(record_dir)
     print(f"USB 카메라 스트리밍 시작 (인덱스: {camera_index}). 종료: 'q', 저장: 's'")
 
     try:
         while True:
-            ret, frame = cap.read()
-            if not ret:
+            try:
+                frame = source.read()
+            except Exception as e:
+                print(f"[오류] 프레임 소스 읽기 실패: {e}")
+                break
+            if frame is None:
+                if source.finished:
+                    print("[정보] 프레임 소스의 끝에 도달했습니다.")
+                    break
                 print("[경고] USB 카메라 프레임 읽기 실패")
                 time.sleep(0.1)
                 continue
 
             processed_frame = frame.copy()
+            # 파일 기반 소스의 timestamp는 재생 시각이므로 현재 시각 사용
+            capture_time = source.last_timestamp if source.live else time.time()
             detected_info = [] # ArUco 정보 초기화
 
             # 왜곡 보정
-            if use_calibration and K is not None and D is not None:
-                processed_frame, temp_K = undistort_frame(processed_frame, K, D)
-                if temp_K is not None:
-                    new_K = temp_K
+            if undistorter is not None:
+                processed_frame, new_K = undistorter(processed_frame)
             else:
                  new_K = K # 왜곡 보정 안 할 시 원본 K (또는 None) 사용
 
@@ -178,20 +327,96 @@ def run_usb_camera(
                 processed_frame, detected_info = detect_aruco(
                     processed_frame, new_K, D, aruco_type, marker_length
                 )
+                first_pose_reported = _report_first_pose(detected_info, first_pose_reported)
+                if pose_publisher is not None:
+                    pose_publisher.publish(source.frame_index, capture_time, poses_from_info(detected_info))
                 # if detected_info: # 감지된 정보가 있을 때만 출력 (선택적)
                 #     print(detected_info)
             # --- ArUco 감지 끝 ---
 
+            if recorder is not None:
+                recorder.submit(processed_frame, capture_time, source.frame_index, detected_info)
+
             # 화면 표시
-            result = display_frame(processed_frame, f"USB Camera Feed (Index: {camera_index})")
+            result = display.show(processed_frame)
             if result == "quit":
                 break
 
     finally:
-        cap.release()
+        source.release()
+        display.close()
+        if recorder is not None:
+            recorder.close()
+        if pose_publisher is not None:
+            pose_publisher.close()
         cv2.destroyAllWindows()
         print("USB 카메라 스트림 종료.")
 
+def run_multi_camera(
+    sources, calibration_files, use_calibration, detect_aruco_flag, aruco_type, marker_length,
+    workers=None, publish_poses=False, display_fps=config.DISPLAY_FPS, track_poses=False,
+):
+    """여러 카메라를 카메라별 캡처 스레드와 공유 감지 워커 풀로 한 프로세스에서 처리합니다.
+
+    포즈 게시 시 stream_id는 카메라 순번(sources 내 위치)입니다.
+    """
+    import cv2
+    from frame_display import FrameDisplay
+    from image_processor import poses_from_info
+    from multi_camera import MultiCameraClient
+
+    cameras = []
+    for spec, calibration_file in zip(sources, calibration_files):
+        K, D, undistorter = _load_calibration(use_calibration, calibration_file)
+        cameras.append((spec, K, D, undistorter))
+
+    pose_publisher = _create_pose_publisher(publish_poses, track_poses, num_streams=len(cameras))
+    first_pose = {"reported": False}
+
+    def on_result(camera_id, frame_index, capture_time, frame, detected_info):
+        first_pose["reported"] = _report_first_pose(detected_info, first_pose["reported"])
+        if pose_publisher is not None and detect_aruco_flag:
+            pose_publisher.publish(frame_index, capture_time, poses_from_info(detected_info), stream_id=camera_id)
+
+    try:
+        client = MultiCameraClient(
+            cameras, workers, aruco_type, marker_length, detect=detect_aruco_flag, on_result=on_result
+        ).start()
+    except IOError as e:
+        print(f"[오류] 카메라를 열 수 없습니다: {e}")
+        if pose_publisher is not None:
+            pose_publisher.close()
+        return
+
+    display = FrameDisplay("Multi Camera", display_fps)
+    interval = 1.0 / display_fps if display_fps > 0 else 1.0 / config.DISPLAY_FPS
+    last_report = time.time()
+    print(f"다중 카메라 스트리밍 시작: {list(sources)}. 종료: 'q', 저장: 's'")
+
+    try:
+        while not client.finished:
+            result = display.show(client.mosaic())
+            if result == "quit":
+                break
+            now = time.time()
+            if now - last_report >= config.MULTI_CAMERA_STATS_INTERVAL:
+                client.report()
+                last_report = now
+            time.sleep(interval)
+        else:
+            print("[정보] 모든 프레임 소스의 끝에 도달했습니다.")
+    except KeyboardInterrupt:
+        print("\nCtrl+C 감지. 클라이언트 종료 중...")
+    finally:
+        client.close()
+        client.report()
+        display.close()
+        if pose_publisher is not None:
+            pose_publisher.close()
+        cv2.destroyAllWindows()
+        print("다중 카메라 스트림 종료.")
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="카메라 클라이언트 실행 (UDP 또는 USB)"
@@ -199,9 +424,9 @@ if __name__ == "__main__":
     parser.add_argument(
         "--source",
         type=str,
-        choices=["udp", "usb"],
         default="udp",
-        help="영상 입력 소스 선택 (기본값: udp)",
+        help="영상 입력 소스 선택: udp, usb, multi(다중 카메라), pose(서버 포즈 모드 수신), file(일괄 처리) 또는 프레임 소스 지정 문자열 "
+        "(동영상 파일, 이미지 디렉터리, synthetic[:N], replay:경로, /dev/videoN) (기본값: udp)",
     )
     parser.add_argument(
         "--camera_index",
@@ -230,7 +455,7 @@ if __name__ == "__main__":
         "--aruco_type",
         type=str,
         default=config.ARUCO_DICT_TYPE,
-        choices=config.ARUCO_DICT.keys(),
+        choices=config.ARUCO_DICT_NAMES,
         help=f"감지할 ArUco 마커 타입 (기본값: {config.ARUCO_DICT_TYPE})",
     )
     parser.add_argument(
@@ -239,6 +464,88 @@ if __name__ == "__main__":
         default=config.ARUCO_MARKER_LENGTH,
         help=f"ArUco 마커 실제 크기(미터) (기본값: {config.ARUCO_MARKER_LENGTH})",
     )
+    parser.add_argument(
+        "--record",
+        type=str,
+        metavar="DIR",
+        help="주석이 그려진 영상(구간 파일)과 감지 로그(JSONL)를 DIR에 백그라운드로 녹화",
+    )
+    parser.add_argument(
+        "--display_fps",
+        type=float,
+        default=config.DISPLAY_FPS,
+        help="별도 렌더 스레드의 최대 표시 FPS. 0이면 처리 루프에서 직접 표시 "
+        f"(기본값: {config.DISPLAY_FPS})",
+    )
+    parser.add_argument(
+        "--recv_policy",
+        type=str,
+        choices=["latest", "all"],
+        default=config.RECV_POLICY,
+        help="UDP 재조립 정책: latest(최신 프레임 우선, 오래된 프레임 폐기), all(모든 프레임 전달) "
+        f"(기본값: {config.RECV_POLICY})",
+    )
+    parser.add_argument(
+        "--publish_poses",
+        action=argparse.BooleanOptionalAction,
+        default=False,
+        help=f"감지된 포즈를 바이너리 레코드로 게시 (구독: UDP {config.POSE_CONTROL_PORT} 또는 {config.POSE_UNIX_SOCKET})",
+    )
+    parser.add_argument(
+        "--shm_ring",
+        nargs="?",
+        const=config.SHM_FRAME_RING_NAME,
+        help="UDP 소스에서 디코딩된 프레임을 공유 메모리 링에 게시 "
+        f"(이름 생략 시 {config.SHM_FRAME_RING_NAME})",
+    )
+    parser.add_argument(
+        "--shm_slots",
+        type=int,
+        default=config.SHM_FRAME_RING_SLOTS,
+        help=f"공유 메모리 링 슬롯 수 (기본값: {config.SHM_FRAME_RING_SLOTS})",
+    )
+    parser.add_argument(
+        "--input",
+        type=str,
+        help="--source file 일괄 처리 시 입력 동영상 파일 또는 이미지 디렉터리",
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="detections.csv",
+        help="--source file 일괄 처리 결과 파일 (.csv, .parquet, .npz) (기본값: detections.csv)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="--source file 일괄 처리 워커 프로세스 수, --source multi 감지 워커 스레드 수 (기본값: CPU 코어 수)",
+    )
+    parser.add_argument(
+        "--cameras",
+        type=str,
+        default=",".join(config.MULTI_CAMERA_SOURCES),
+        help="--source multi 카메라 목록 (쉼표 구분) "
+        f"(기본값: {','.join(config.MULTI_CAMERA_SOURCES)})",
+    )
+    parser.add_argument(
+        "--calibration_files",
+        type=str,
+        help="--source multi 카메라별 캘리브레이션 파일 (쉼표 구분, 하나만 주면 모든 카메라에 적용) "
+        "(기본값: config.MULTI_CAMERA_CALIBRATION_FILES)",
+    )
+    parser.add_argument(
+        "--track_poses",
+        action="store_true",
+        help="감지 포즈를 추적 필터에 넣고 캡처 시각 기준으로 현재 시각까지 외삽한 포즈를 "
+        f"{config.TRACKER_OUTPUT_HZ} Hz로 게시 (--publish_poses 포함)",
+    )
+    parser.add_argument(
+        "--detector_profile",
+        type=str,
+        default=config.DETECTOR_PROFILE_FILE,
+        help="detector_tuner.py로 생성한 감지 파라미터 프로파일, 파일이 없으면 기본값 사용 "
+        f"(기본값: {config.DETECTOR_PROFILE_FILE})",
+    )
     args = parser.parse_args()
 
     camera_index = args.camera_index
@@ -255,6 +562,31 @@ if __name__ == "__main__":
         if calibration_file is None:
             calibration_file = config.UDP_CALIBRATION_FILE
             print(f"UDP 캘리브레이션 파일이 지정되지 않아 config.py의 값({calibration_file})을 사용합니다.")
+    elif args.source == "multi":
+        multi_sources = [c.strip() for c in args.cameras.split(",") if c.strip()]
+        if args.calibration_files:
+            multi_calibration_files = [f.strip() for f in args.calibration_files.split(",")]
+        else:
+            multi_calibration_files = list(config.MULTI_CAMERA_CALIBRATION_FILES)
+        if len(multi_calibration_files) == 1:
+            multi_calibration_files *= len(multi_sources)
+        # 캘리브레이션 파일이 부족한 카메라는 USB 기본 파일 사용
+        multi_calibration_files += [config.USB_CALIBRATION_FILE] * (len(multi_sources) - len(multi_calibration_files))
+    elif args.source == "pose":
+        pass # 포즈는 서버에서 캘리브레이션 적용
+    elif args.source == "file":
+        if calibration_file is None:
+            calibration_file = config.USB_CALIBRATION_FILE
+            print(f"캘리브레이션 파일이 지정되지 않아 config.py의 값({calibration_file})을 사용합니다.")
+    else:
+        # 그 외 소스(파일, 디렉터리, synthetic 등)는 USB 경로로 처리
+        camera_index = args.source
+        if calibration_file is None:
+            calibration_file = config.USB_CALIBRATION_FILE
+            print(f"캘리브레이션 파일이 지정되지 않아 config.py의 값({calibration_file})을 사용합니다.")
+
+    if args.source not in ("pose", "file"):  # 일괄 처리는 워커 프로세스에서 로드
+        _load_detector_profile(args.detector_profile)
 
     if args.source == "udp":
         run_udp_client(
@@ -263,8 +595,48 @@ if __name__ == "__main__":
             args.detect_aruco,
             args.aruco_type,
             args.aruco_length,
+            shm_ring_name=args.shm_ring,
+            shm_ring_slots=args.shm_slots,
+            publish_poses=args.publish_poses,
+            recv_policy=args.recv_policy,
+            display_fps=args.display_fps,
+            record_dir=args.record,
+            track_poses=args.track_poses,
         )
-    elif args.source == "usb":
+    elif args.source == "multi":
+        run_multi_camera(
+            multi_sources,
+            multi_calibration_files,
+            args.calibration,
+            args.detect_aruco,
+            args.aruco_type,
+            args.aruco_length,
+            workers=args.workers,
+            publish_poses=args.publish_poses,
+            display_fps=args.display_fps,
+            track_poses=args.track_poses,
+        )
+    elif args.source == "pose":
+        run_pose_client()
+    elif args.source == "file":
+        # 화면 표시 없는 오프라인 일괄 처리
+        if args.input is None:
+            print("[오류] --source file 선택 시 --input을 지정해야 합니다.")
+        else:
+            from batch_processor import run_batch
+            try:
+                run_batch(
+                    args.input,
+                    args.output,
+                    calibration_file if args.calibration else None,
+                    args.aruco_type,
+                    args.aruco_length,
+                    workers=args.workers,
+                    detector_profile=args.detector_profile,
+                )
+            except IOError as e:
+                print(f"[오류] 일괄 처리 입력을 열 수 없습니다: {e}")
+    else:
          # USB는 카메라 인덱스 필수
         if camera_index is None:
             print("[오류] USB 소스 선택 시 --camera_index를 지정해야 합니다.")
@@ -276,5 +648,9 @@ if __name__ == "__main__":
                 args.detect_aruco,
                 args.aruco_type,
                 args.aruco_length,
+                publish_poses=args.publish_poses,
+                display_fps=args.display_fps,
+                record_dir=args.record,
+                track_poses=args.track_poses,
             )
 
@@ -1,13 +1,23 @@
+import argparse
+import os
 import time
 import config
-from camera_handler import CameraHandler
-from udp_sender import UdpSender
 
+# cv2/numpy 등 무거운 모듈은 실행 함수 안에서 import 하여 --help 등의 시작 비용을 줄임
+
+
+def main(source=config.UDP_CAMERA_INDEX, motion_mode=config.MOTION_MODE, roi=config.MOTION_ROI):
+    """영상 모드: 프레임을 JPEG로 전송합니다.
+
+    motion_mode가 "off"가 아니면 motion_gate.MotionGate로 변화 없는 프레임은 건너뛰고
+    (keep-alive만 전송) 변한 타일 또는 ROI만 전송합니다.
+    """
+    from camera_handler import CameraHandler
+    from udp_sender import UdpSender
 
-def main():
     try:
         cam_handler = CameraHandler(
-            config.UDP_CAMERA_INDEX,
+            source,
             config.FRAME_WIDTH,
             config.FRAME_HEIGHT,
             config.FRAME_RATE,
@@ -24,8 +34,21 @@ def main():
         config.SERVER_SEND_BUFFER,
     )
 
+    gate = None
+    if motion_mode != "off":
+        from motion_gate import MotionGate
+        try:
+            gate = MotionGate(motion_mode, config.JPEG_QUALITY, roi=roi)
+        except ValueError as e:
+            print(f"[오류] 움직임 기반 전송 설정 오류: {e}")
+            cam_handler.release_camera()
+            sender.close()
+            return
+        print(f"움직임 기반 전송 사용: {motion_mode} (ROI {roi})")
+
     last_send_time = time.time()
     target_interval = 1.0 / config.FRAME_RATE if config.FRAME_RATE > 0 else 0
+    frames_captured = 0
 
     print(f"UDP 스트리밍 서버 시작. 대상: {config.SERVER_IP}:{config.PORT}")
     print("종료하려면 Ctrl+C를 누르세요.")
@@ -44,10 +67,21 @@ def main():
             # 새 프레임 캡처
             frame = cam_handler.capture_frame()
             if frame is None:
+                if cam_handler.finished:
+                    print("프레임 소스의 끝에 도달했습니다.")
+                    break
                 continue  # 프레임 읽기 실패 시 다음 루프
 
             # 프레임 전송
-            sender.send_frame(frame, config.JPEG_QUALITY)
+            frames_captured += 1
+            # 파일 기반 소스의 timestamp는 재생 시각이므로 현재 시각 사용
+            capture_time = cam_handler.last_timestamp if cam_handler.source.live else time.time()
+            if gate is None:
+                sender.send_frame(frame, config.JPEG_QUALITY, capture_time)
+            else:
+                _, payload = gate.encode(frame)
+                if payload is not None and sender.send_payload(payload, capture_time):
+                    gate.sent(sender.frame_seq)
 
             # 전송 시간 업데이트
             last_send_time = time.time()
@@ -58,6 +92,9 @@ def main():
         print(f"\n[오류] 서버 실행 중 예외 발생: {e}")
     finally:
         print("리소스 정리 중...")
+        if gate is not None and frames_captured:
+            print(f"[정보] 움직임 기반 전송 통계 ({frames_captured} 프레임): {gate.stats}, "
+                  f"프레임당 평균 {gate.stats['bytes'] / frames_captured / 1024:.1f} KB")
         cam_handler.release_camera()
         sender.close()
         # if mycobot: # MyCobot 사용 시 로봇 연결 해제 등 추가 가능
@@ -65,5 +102,174 @@ def main():
         print("서버 종료 완료.")
 
 
+def main_pose(source=config.UDP_CAMERA_INDEX, calibration_file=config.UDP_CALIBRATION_FILE,
+              aruco_type=config.ARUCO_DICT_TYPE, marker_length=config.ARUCO_MARKER_LENGTH,
+              thumbnail_fps=config.THUMBNAIL_FPS, detector_profile=config.DETECTOR_PROFILE_FILE):
+    """엣지 감지 모드: 서버에서 ArUco를 감지하고 영상 대신 포즈 패킷을 카메라 속도로 전송합니다.
+
+    thumbnail_fps > 0 이면 모니터링용 저해상도 썸네일을 기존 영상 포트로 함께 보냅니다.
+    """
+    import cv2
+    from calibration_utils import load_calibration_cached
+    from camera_handler import CameraHandler
+    from image_processor import estimate_poses, load_detector_profile
+    from pose_publisher import PosePublisher
+
+    if detector_profile and os.path.exists(detector_profile):
+        try:
+            load_detector_profile(detector_profile)
+            print(f"감지 파라미터 프로파일 로드 완료: {detector_profile}")
+        except Exception as e:
+            print(f"[경고] 감지 파라미터 프로파일 로드 실패 ({detector_profile}): {e}")
+
+    try:
+        K, D, _ = load_calibration_cached(calibration_file)
+        print(f"카메라 캘리브레이션 로드 완료: {calibration_file}")
+    except Exception as e:
+        print(f"[오류] 포즈 모드에는 캘리브레이션이 필요합니다 ({calibration_file}): {e}")
+        return
+
+    try:
+        cam_handler = CameraHandler(
+            source,
+            config.FRAME_WIDTH,
+            config.FRAME_HEIGHT,
+            config.FRAME_RATE,
+            config.CAMERA_BUFFERSIZE,
+        )
+    except IOError as e:
+        print(f"카메라 초기화 오류: {e}")
+        return
+
+    # 기본 대상(SERVER_IP:POSE_PORT)에는 항상 전송하고, 추가 구독자는 제어 포트로 등록
+    try:
+        pose_publisher = PosePublisher(
+            config.POSE_CONTROL_PORT,
+            unix_path=config.POSE_UNIX_SOCKET,
+            static_targets=[(config.SERVER_IP, config.POSE_PORT)],
+        )
+    except OSError as e:
+        print(f"[오류] 포즈 게시자 생성 실패 (포트 또는 Unix 소켓 사용 중): {e}")
+        cam_handler.release_camera()
+        return
+    thumb_sender = None
+    if thumbnail_fps > 0:
+        from udp_sender import UdpSender
+        thumb_sender = UdpSender(config.SERVER_IP, config.PORT, config.CHUNK_SIZE, config.SERVER_SEND_BUFFER)
+
+    frame_id = 0
+    last_thumb_time = 0.0
+    stats_start = time.time()
+    stats_frames = 0
+    print(f"포즈 스트리밍 서버 시작. 대상: {config.SERVER_IP}:{config.POSE_PORT}")
+    print("종료하려면 Ctrl+C를 누르세요.")
+
+    try:
+        while True:
+            # 카메라 속도 그대로 처리 (프레임 레이트 제한 없음)
+            frame = cam_handler.capture_frame()
+            if frame is None:
+                if cam_handler.finished:
+                    print("프레임 소스의 끝에 도달했습니다.")
+                    break
+                continue
+            # 파일 기반 소스의 timestamp는 재생 시각이므로 현재 시각 사용
+            capture_time = cam_handler.last_timestamp if cam_handler.source.live else time.time()
+
+            corners, ids, poses = estimate_poses(frame, K, D, aruco_type, marker_length)
+            # 마커가 없어도 전송하여 수신 측이 프레임 진행을 알 수 있게 함
+            pose_publisher.publish(frame_id, capture_time, poses)
+            frame_id += 1
+
+            now = time.time()
+            if thumb_sender is not None and now - last_thumb_time >= 1.0 / thumbnail_fps:
+                if ids is not None:
+                    cv2.aruco.drawDetectedMarkers(frame, corners, ids)
+                scale = config.THUMBNAIL_WIDTH / frame.shape[1]
+                thumb = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+                thumb_sender.send_frame(thumb, config.JPEG_QUALITY)
+                last_thumb_time = now
+
+            stats_frames += 1
+            if now - stats_start >= 5.0:
+                print(f"[정보] 포즈 전송 {stats_frames / (now - stats_start):.1f} FPS")
+                stats_start, stats_frames = now, 0
+
+    except KeyboardInterrupt:
+        print("\nCtrl+C 감지. 서버 종료 중...")
+    except Exception as e:
+        print(f"\n[오류] 서버 실행 중 예외 발생: {e}")
+    finally:
+        print("리소스 정리 중...")
+        cam_handler.release_camera()
+        pose_publisher.close()
+        if thumb_sender is not None:
+            thumb_sender.close()
+        print("서버 종료 완료.")
+
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="UDP 카메라 스트리밍 서버")
+    parser.add_argument(
+        "--source",
+        type=str,
+        default=str(config.UDP_CAMERA_INDEX),
+        help="프레임 소스: 카메라 인덱스, /dev/videoN, 동영상 파일, 이미지 디렉터리, "
+        f"synthetic[:N], replay:경로 (기본값: {config.UDP_CAMERA_INDEX})",
+    )
+    parser.add_argument(
+        "--mode",
+        type=str,
+        choices=["video", "pose"],
+        default="video",
+        help="video: JPEG 영상 전송, pose: 서버에서 ArUco 감지 후 포즈만 전송 (기본값: video)",
+    )
+    parser.add_argument(
+        "--calibration_file",
+        type=str,
+        default=config.UDP_CALIBRATION_FILE,
+        help=f"포즈 모드 캘리브레이션 파일 (기본값: {config.UDP_CALIBRATION_FILE})",
+    )
+    parser.add_argument(
+        "--thumbnail_fps",
+        type=float,
+        default=config.THUMBNAIL_FPS,
+        help=f"포즈 모드 모니터링 썸네일 전송 FPS, 0이면 끔 (기본값: {config.THUMBNAIL_FPS})",
+    )
+    parser.add_argument(
+        "--detector_profile",
+        type=str,
+        default=config.DETECTOR_PROFILE_FILE,
+        help=f"포즈 모드 감지 파라미터 프로파일 (기본값: {config.DETECTOR_PROFILE_FILE})",
+    )
+    parser.add_argument(
+        "--motion",
+        type=str,
+        choices=["off", "full", "tiles", "roi"],
+        default=config.MOTION_MODE,
+        help="영상 모드 움직임 기반 전송: off 매 프레임, full 변화 시 전체 프레임, "
+        f"tiles 변한 타일만, roi ROI만 (기본값: {config.MOTION_MODE})",
+    )
+    parser.add_argument(
+        "--roi",
+        type=str,
+        help="roi 모드 관심 영역 x,y,w,h (기본값: config.MOTION_ROI)",
+    )
+    args = parser.parse_args()
+    if args.mode == "pose":
+        main_pose(args.source, args.calibration_file, thumbnail_fps=args.thumbnail_fps,
+                  detector_profile=args.detector_profile)
+    else:
+        roi = config.MOTION_ROI
+        if args.motion == "roi" or args.roi:
+            from motion_gate import clip_roi, parse_roi
+            try:
+                roi = parse_roi(args.roi) if args.roi else roi
+                if args.motion == "roi":
+                    if roi is None:
+                        raise ValueError("roi 모드에는 ROI(x,y,w,h)가 필요합니다.")
+                    # 요청 해상도 기준으로 미리 확인 (실제 프레임 크기로 인코딩 시 다시 자름)
+                    roi = clip_roi(roi, config.FRAME_WIDTH, config.FRAME_HEIGHT)
+            except ValueError as e:
+                parser.error(f"--roi: {e}")
+        main(args.source, args.motion, roi)
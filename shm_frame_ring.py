@@ -0,0 +1,265 @@
+# shm_frame_ring.py
+"""공유 메모리 프레임 링 버퍼.
+
+run_udp_client가 디코딩한 프레임을 multiprocessing.shared_memory 링 버퍼에 게시하면,
+감지/녹화/표시 등 같은 장비의 여러 프로세스가 UDP 소켓을 따로 열거나 JPEG를
+다시 디코딩하지 않고 동일한 프레임을 NumPy 뷰로 읽을 수 있습니다.
+
+메모리 구성:
+    [헤더][슬롯 메타데이터 x slots][슬롯 데이터 x slots]
+
+읽기 프로토콜 (잠금 없음, 쓰기 프로세스는 하나):
+    - 쓰기: seq_begin = n -> 픽셀 복사 -> timestamp/크기 기록 -> seq_end = n -> write_seq = n
+    - 읽기: write_seq로 최신 시퀀스 확인 -> 슬롯의 seq_end == n 이면 완성된 프레임.
+      반환된 뷰는 복사본이 아니므로 사용 후 still_valid(n)으로 덮어쓰기 여부를 확인합니다.
+      소비자가 slots - 1 프레임 이상 뒤처지면 최신 프레임으로 건너뜁니다.
+"""
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+import config
+
+MAGIC = 0x41525247  # "ARRG"
+VERSION = 2
+ALIGN = 64
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("slots", "<u4"),
+    ("max_height", "<u4"),
+    ("max_width", "<u4"),
+    ("channels", "<u4"),
+    ("write_seq", "<u8"),  # 마지막으로 완성된 프레임 시퀀스 (0: 없음)
+    ("writer_pid", "<u8"),  # 게시자 프로세스 ID (같은 이름의 중복 게시자 감지용)
+])
+SLOT_DTYPE = np.dtype([
+    ("seq_begin", "<u8"),  # 쓰기 시작한 시퀀스
+    ("seq_end", "<u8"),    # 쓰기를 마친 시퀀스
+    ("timestamp", "<f8"),  # 프레임 수신/캡처 시각 (time.time())
+    ("height", "<u4"),
+    ("width", "<u4"),
+])
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # 다른 사용자의 살아 있는 프로세스
+    return True
+
+
+class ShmFrameRing:
+    """공유 메모리 프레임 링 버퍼. create=True는 게시자, create=False는 소비자입니다."""
+
+    def __init__(self, name, width=config.FRAME_WIDTH, height=config.FRAME_HEIGHT, channels=3,
+                 slots=8, create=True):
+        self.name = name
+        self.create = create
+        if create:
+            slot_bytes = _align(width * height * channels)
+            size = self._layout(slots, slot_bytes)
+            try:
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            except FileExistsError:
+                self._remove_stale(name)
+                self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            self._map()
+            self.header["magic"] = MAGIC
+            self.header["version"] = VERSION
+            self.header["slots"] = slots
+            self.header["max_height"] = height
+            self.header["max_width"] = width
+            self.header["channels"] = channels
+            self.header["write_seq"] = 0
+            self.header["writer_pid"] = os.getpid()
+            self.meta[:] = 0
+            print(f"공유 메모리 프레임 링 생성: {name} ({slots} 슬롯, {width}x{height}x{channels}, {size / 1e6:.1f} MB)")
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            # 소비자가 종료될 때 resource_tracker가 세그먼트를 지우지 않도록 등록 해제
+            try:
+                resource_tracker.unregister(self.shm._name, "shared_memory")
+            except Exception:
+                pass
+            header = np.ndarray((), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+            if int(header["magic"]) != MAGIC or int(header["version"]) != VERSION:
+                self.shm.close()
+                raise ValueError(f"공유 메모리 {name}는 프레임 링 형식이 아닙니다.")
+            slots = int(header["slots"])
+            height, width, channels = int(header["max_height"]), int(header["max_width"]), int(header["channels"])
+            self._layout(slots, _align(width * height * channels))
+            del header
+            self._map()
+
+        self.slots = slots
+        self.max_height, self.max_width, self.channels = height, width, channels
+        self.next_seq = 1  # 소비자가 다음에 읽을 시퀀스
+        self.skipped = 0  # 뒤처져서 건너뛴 프레임 수
+
+    @staticmethod
+    def _remove_stale(name):
+        """같은 이름의 세그먼트가 비정상 종료된 게시자가 남긴 것일 때만 삭제합니다.
+
+        다른 게시자가 사용 중이거나 프레임 링 형식이 아니면 FileExistsError를 발생시킵니다.
+        """
+        old = shared_memory.SharedMemory(name=name)
+        # 삭제하지 않고 남겨 둘 때 이 프로세스 종료 시 resource_tracker가 지우지 않도록 등록 해제
+        try:
+            resource_tracker.unregister(old._name, "shared_memory")
+        except Exception:
+            pass
+        try:
+            if old.size < HEADER_DTYPE.itemsize:
+                raise FileExistsError(f"공유 메모리 {name}가 이미 있으며 프레임 링 형식이 아닙니다.")
+            header = np.ndarray((), dtype=HEADER_DTYPE, buffer=old.buf)
+            magic, version = int(header["magic"]), int(header["version"])
+            pid = int(header["writer_pid"]) if version == VERSION else 0
+            del header
+            if magic != MAGIC:
+                raise FileExistsError(f"공유 메모리 {name}가 이미 있으며 프레임 링 형식이 아닙니다.")
+            if version != VERSION:
+                raise FileExistsError(
+                    f"공유 메모리 {name}는 다른 버전({version})의 프레임 링입니다. "
+                    f"사용 중이 아니라면 /dev/shm/{name}을 삭제하세요."
+                )
+            if _pid_alive(pid):
+                raise FileExistsError(f"공유 메모리 프레임 링 {name}를 다른 게시자(PID {pid})가 사용 중입니다.")
+            print(f"[정보] 종료된 게시자(PID {pid})가 남긴 공유 메모리 {name}를 다시 생성합니다.")
+            resource_tracker.register(old._name, "shared_memory")
+            old.unlink()
+        finally:
+            old.close()
+
+    def _layout(self, slots, slot_bytes):
+        self._slot_bytes = slot_bytes
+        self._meta_offset = _align(HEADER_DTYPE.itemsize)
+        self._data_offset = _align(self._meta_offset + SLOT_DTYPE.itemsize * slots)
+        return self._data_offset + slot_bytes * slots
+
+    def _map(self):
+        buf = self.shm.buf
+        slots = (len(buf) - self._data_offset) // self._slot_bytes
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=buf)
+        self.meta = np.ndarray((slots,), dtype=SLOT_DTYPE, buffer=buf, offset=self._meta_offset)
+        self.data = np.ndarray((slots, self._slot_bytes), dtype=np.uint8, buffer=buf, offset=self._data_offset)
+
+    # ----- 게시자 -----
+    def publish(self, frame, timestamp=None):
+        """프레임을 다음 슬롯에 복사하고 시퀀스 번호를 반환합니다. 크기가 맞지 않으면 None."""
+        h, w = frame.shape[:2]
+        c = frame.shape[2] if frame.ndim == 3 else 1
+        if h > self.max_height or w > self.max_width or c != self.channels:
+            print(f"[경고] 프레임 크기({w}x{h}x{c})가 공유 메모리 링({self.max_width}x{self.max_height}x{self.channels})과 맞지 않아 건너뜀")
+            return None
+
+        seq = int(self.header["write_seq"]) + 1
+        slot = seq % self.slots
+        meta = self.meta[slot]
+        meta["seq_begin"] = seq
+        self.data[slot, :h * w * c].reshape(h, w, c)[...] = frame.reshape(h, w, c)
+        meta["timestamp"] = time.time() if timestamp is None else timestamp
+        meta["height"] = h
+        meta["width"] = w
+        meta["seq_end"] = seq
+        self.header["write_seq"] = seq
+        return seq
+
+    # ----- 소비자 -----
+    @property
+    def write_seq(self):
+        return int(self.header["write_seq"])
+
+    def _view(self, seq):
+        slot = seq % self.slots
+        meta = self.meta[slot]
+        if int(meta["seq_end"]) != seq or int(meta["seq_begin"]) != seq:
+            return None
+        h, w = int(meta["height"]), int(meta["width"])
+        timestamp = float(meta["timestamp"])
+        view = self.data[slot, :h * w * self.channels].reshape(h, w, self.channels)
+        view.flags.writeable = False
+        return seq, timestamp, view
+
+    def latest(self):
+        """가장 최근 프레임을 (seq, timestamp, view)로 반환합니다. 없으면 None."""
+        seq = self.write_seq
+        if seq == 0:
+            return None
+        result = self._view(seq)
+        if result is not None:
+            self.next_seq = seq + 1
+        return result
+
+    def next_frame(self):
+        """아직 읽지 않은 다음 프레임을 반환합니다. 뒤처졌으면 최신 프레임으로 건너뜁니다."""
+        latest = self.write_seq
+        if latest < self.next_seq:
+            return None
+        if latest - self.next_seq >= self.slots - 1:
+            self.skipped += latest - self.next_seq
+            self.next_seq = latest
+        result = self._view(self.next_seq)
+        if result is None:  # 읽는 사이에 덮어써짐 -> 최신으로 이동
+            self.skipped += latest - self.next_seq
+            return self.latest()
+        self.next_seq += 1
+        return result
+
+    def still_valid(self, seq):
+        """seq 프레임의 뷰가 아직 덮어써지지 않았는지 확인합니다."""
+        return int(self.meta[seq % self.slots]["seq_begin"]) == seq
+
+    def close(self):
+        """공유 메모리를 닫습니다. 게시자는 세그먼트도 제거합니다."""
+        # NumPy 뷰가 버퍼를 참조하고 있으면 close가 실패하므로 먼저 해제
+        self.header = self.meta = self.data = None
+        try:
+            self.shm.close()
+            if self.create:
+                self.shm.unlink()
+                print(f"공유 메모리 프레임 링 제거: {self.name}")
+        except (BufferError, FileNotFoundError) as e:
+            print(f"[경고] 공유 메모리 정리 중 오류: {e}")
+
+
+# 테스트용 소비자 (직접 실행 시): python shm_frame_ring.py [이름]
+if __name__ == '__main__':
+    import sys
+    import cv2
+
+    name = sys.argv[1] if len(sys.argv) > 1 else config.SHM_FRAME_RING_NAME
+    ring = ShmFrameRing(name, create=False)
+    print(f"공유 메모리 프레임 링 구독: {name}. 종료: 'q'")
+    try:
+        while True:
+            result = ring.next_frame()
+            if result is None:
+                time.sleep(0.005)
+                continue
+            seq, timestamp, view = result
+            latency_ms = (time.time() - timestamp) * 1000
+            cv2.imshow(f"SHM Ring: {name}", view)
+            if not ring.still_valid(seq):
+                print(f"[경고] 프레임 {seq}가 사용 중 덮어써졌습니다.")
+            del view
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+            print(f"\rseq {seq}, 지연 {latency_ms:.1f} ms, 건너뜀 {ring.skipped}", end="")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.close()
+        cv2.destroyAllWindows()
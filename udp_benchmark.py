@@ -0,0 +1,307 @@
+# udp_benchmark.py
+"""UdpSender/UdpReceiver 루프백 벤치마크.
+
+두 대의 장비와 Wi-Fi 없이 전송 계층 변경 사항을 평가하기 위해
+localhost 위에서 송신기와 수신기를 구동합니다. 필요하면 중간에 로컬 UDP
+프록시를 두어 손실, 순서 뒤바뀜, 중복, 지연을 인위적으로 주입합니다.
+
+예시:
+    python udp_benchmark.py --duration 10 --loss 0.02 --reorder 0.01 --delay_ms 5
+"""
+import argparse
+import heapq
+import random
+import socket
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import config
+from udp_receiver import UdpReceiver
+from udp_sender import UdpSender
+
+
+class LossyUdpProxy:
+    """패킷 손실/순서 뒤바뀜/중복/지연을 주입하는 로컬 UDP 프록시."""
+
+    def __init__(self, listen_port, target_port, loss=0.0, reorder=0.0, duplicate=0.0,
+                 delay_ms=0.0, jitter_ms=0.0, reorder_delay_ms=5.0, host="127.0.0.1", seed=None):
+        self.listen_addr = (host, listen_port)
+        self.target_addr = (host, target_port)
+        self.loss = loss
+        self.reorder = reorder
+        self.duplicate = duplicate
+        self.delay = delay_ms / 1000.0
+        self.jitter = jitter_ms / 1000.0
+        self.reorder_delay = reorder_delay_ms / 1000.0
+        self.rng = random.Random(seed)
+
+        self.stats = {"received": 0, "dropped": 0, "reordered": 0, "duplicated": 0, "forwarded": 0}
+        self._queue = []  # (전달 시각, 순번, 데이터) 힙
+        self._counter = 0
+        self._cond = threading.Condition()
+        self._running = False
+        self._threads = []
+
+        self.in_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.in_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+        self.in_sock.bind(self.listen_addr)
+        self.in_sock.settimeout(0.1)
+        self.out_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def start(self):
+        self._running = True
+        self._threads = [
+            threading.Thread(target=self._receive_loop, daemon=True),
+            threading.Thread(target=self._forward_loop, daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        print(f"손실 주입 프록시 시작: {self.listen_addr[1]} -> {self.target_addr[1]}")
+
+    def _schedule(self, data, release_time):
+        with self._cond:
+            heapq.heappush(self._queue, (release_time, self._counter, data))
+            self._counter += 1
+            self._cond.notify()
+
+    def _receive_loop(self):
+        """수신한 패킷마다 손상 규칙을 적용하여 전달 큐에 넣습니다."""
+        while self._running:
+            try:
+                data, _ = self.in_sock.recvfrom(65535)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            self.stats["received"] += 1
+            if self.rng.random() < self.loss:
+                self.stats["dropped"] += 1
+                continue
+
+            release_time = time.perf_counter() + self.delay
+            if self.jitter > 0:
+                release_time += self.rng.uniform(0, self.jitter)
+            if self.rng.random() < self.reorder:
+                # 추가 지연을 주어 뒤에 오는 패킷에게 추월당하도록 함
+                release_time += self.reorder_delay
+                self.stats["reordered"] += 1
+            self._schedule(data, release_time)
+
+            if self.rng.random() < self.duplicate:
+                self.stats["duplicated"] += 1
+                self._schedule(data, release_time + self.rng.uniform(0, max(self.jitter, 0.001)))
+
+    def _forward_loop(self):
+        """전달 시각이 된 패킷을 대상 포트로 내보냅니다."""
+        while self._running:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait(0.1)
+                if not self._running:
+                    break
+                release_time, _, data = self._queue[0]
+                wait = release_time - time.perf_counter()
+                if wait > 0:
+                    self._cond.wait(wait)
+                    continue
+                heapq.heappop(self._queue)
+            try:
+                self.out_sock.sendto(data, self.target_addr)
+                self.stats["forwarded"] += 1
+            except OSError:
+                pass
+
+    def stop(self):
+        self._running = False
+        with self._cond:
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        self.in_sock.close()
+        self.out_sock.close()
+
+
+def make_synthetic_frames(width, height, count=30):
+    """JPEG 크기가 실제 장면과 비슷하도록 그라디언트, 노이즈, 움직이는 사각형으로 프레임을 만듭니다."""
+    rng = np.random.default_rng(0)
+    xs = np.linspace(0, 255, width, dtype=np.float32)
+    ys = np.linspace(0, 255, height, dtype=np.float32)
+    base = np.empty((height, width, 3), dtype=np.uint8)
+    base[..., 0] = xs[None, :].astype(np.uint8)
+    base[..., 1] = ys[:, None].astype(np.uint8)
+    base[..., 2] = 128
+
+    frames = []
+    size = max(8, min(width, height) // 6)
+    for i in range(count):
+        frame = base.copy()
+        noise = rng.integers(0, 24, size=(height, width, 1), dtype=np.uint8)
+        frame = cv2.add(frame, np.repeat(noise, 3, axis=2))
+        x = int((width - size) * (i / max(count - 1, 1)))
+        y = (height - size) // 2
+        cv2.rectangle(frame, (x, y), (x + size, y + size), (255, 255, 255), -1)
+        cv2.putText(frame, f"{i:03d}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+        frames.append(frame)
+    return frames
+
+
+def _percentile(values, q):
+    if not values:
+        return float("nan")
+    return float(np.percentile(np.asarray(values), q))
+
+
+def run_benchmark(width, height, quality, chunk_size, send_buffer, recv_buffer, fps, duration,
+                  rx_port, proxy_port, loss, reorder, duplicate, delay_ms, jitter_ms, seed=None,
+                  recv_policy=config.RECV_POLICY):
+    """벤치마크를 실행하고 결과 딕셔너리를 반환합니다."""
+    use_proxy = any(v > 0 for v in (loss, reorder, duplicate, delay_ms, jitter_ms))
+
+    receiver = UdpReceiver("127.0.0.1", rx_port, recv_buffer, timeout=0.1, policy=recv_policy,
+                           max_frames=config.RECV_MAX_FRAMES, max_bytes=config.RECV_MAX_BYTES)
+    proxy = None
+    if use_proxy:
+        proxy = LossyUdpProxy(proxy_port, rx_port, loss, reorder, duplicate, delay_ms, jitter_ms, seed=seed)
+        proxy.start()
+    sender = UdpSender("127.0.0.1", proxy_port if use_proxy else rx_port, chunk_size, send_buffer)
+
+    frames = make_synthetic_frames(width, height)
+    send_times = {}  # frame_seq -> 전송 시작 시각 (삽입 순서 = 전송 순서)
+    send_times_lock = threading.Lock()
+    tx = {"frames": 0, "bytes": 0, "cpu": 0.0, "window": duration}
+    rx = {"frames": 0, "bytes": 0, "cpu": 0.0, "latencies": []}
+    stop_receiving = threading.Event()
+
+    def send_loop():
+        interval = 1.0 / fps if fps > 0 else 0.0
+        next_time = time.perf_counter()
+        end_time = next_time + duration
+        i = 0
+        cpu_start = time.thread_time()
+        start_time = next_time
+        while time.perf_counter() < end_time:
+            t0 = time.perf_counter()
+            # 시퀀스 번호는 send_frame 안에서 증가하므로 미리 계산해 둠
+            seq = (sender.frame_seq + 1) % 65536
+            with send_times_lock:
+                send_times[seq] = t0
+                # 완성되지 못한 프레임은 수신기 버퍼 만료 시간이 지나면 제거
+                while send_times and t0 - next(iter(send_times.values())) > receiver.max_buffer_age:
+                    send_times.pop(next(iter(send_times)))
+            if sender.send_frame(frames[i % len(frames)], quality):
+                tx["frames"] += 1
+                tx["bytes"] += sender.last_frame_size
+            i += 1
+            if interval > 0:
+                next_time += interval
+                sleep_time = next_time - time.perf_counter()
+                if sleep_time > 0:
+                    time.sleep(sleep_time)
+        tx["cpu"] = time.thread_time() - cpu_start
+        tx["window"] = time.perf_counter() - start_time
+
+    def receive_loop():
+        cpu_start = time.thread_time()
+        while not stop_receiving.is_set():
+            data = receiver.receive_frame_data()
+            if data:
+                now = time.perf_counter()
+                rx["frames"] += 1
+                rx["bytes"] += len(data)
+                with send_times_lock:
+                    t0 = send_times.pop(receiver.last_frame_seq, None)
+                if t0 is not None:
+                    rx["latencies"].append(now - t0)
+        rx["cpu"] = time.thread_time() - cpu_start
+
+    rx_thread = threading.Thread(target=receive_loop, daemon=True)
+    tx_thread = threading.Thread(target=send_loop, daemon=True)
+    rx_thread.start()
+    tx_thread.start()
+    tx_thread.join()
+    # 지연/재정렬 중인 패킷이 모두 도착할 시간을 줌 (처리량 계산에는 포함하지 않음)
+    time.sleep(0.5 + (delay_ms + jitter_ms) / 1000.0)
+    stop_receiving.set()
+    rx_thread.join()
+
+    sender.close()
+    receiver_stats = dict(receiver.stats)
+    receiver.close()
+    proxy_stats = None
+    if proxy:
+        proxy.stop()
+        proxy_stats = dict(proxy.stats)
+
+    # 송수신 모두 실제 송신 구간 기준으로 계산 (수신 측의 배출 대기 시간 제외)
+    window = tx["window"]
+    return {
+        "tx_fps": tx["frames"] / window,
+        "rx_fps": rx["frames"] / window,
+        "tx_mbps": tx["bytes"] / window / 1e6,
+        "rx_mbps": rx["bytes"] / window / 1e6,
+        "completion_rate": rx["frames"] / tx["frames"] if tx["frames"] else 0.0,
+        "latency_p50_ms": _percentile(rx["latencies"], 50) * 1000,
+        "latency_p95_ms": _percentile(rx["latencies"], 95) * 1000,
+        "latency_max_ms": max(rx["latencies"], default=float("nan")) * 1000,
+        "tx_cpu_ms_per_frame": tx["cpu"] / tx["frames"] * 1000 if tx["frames"] else float("nan"),
+        "rx_cpu_ms_per_frame": rx["cpu"] / rx["frames"] * 1000 if rx["frames"] else float("nan"),
+        "avg_frame_kb": tx["bytes"] / tx["frames"] / 1024 if tx["frames"] else 0.0,
+        "proxy": proxy_stats,
+        "receiver": receiver_stats,
+    }
+
+
+def print_report(result):
+    print("\n===== UDP 루프백 벤치마크 결과 =====")
+    print(f"송신 FPS        : {result['tx_fps']:.1f}")
+    print(f"수신 FPS        : {result['rx_fps']:.1f}")
+    print(f"송신 처리량     : {result['tx_mbps']:.2f} MB/s (평균 프레임 {result['avg_frame_kb']:.1f} KB)")
+    print(f"수신 처리량     : {result['rx_mbps']:.2f} MB/s")
+    print(f"프레임 완성률   : {result['completion_rate'] * 100:.1f}%")
+    print(f"재조립 지연     : p50 {result['latency_p50_ms']:.2f} ms, "
+          f"p95 {result['latency_p95_ms']:.2f} ms, 최대 {result['latency_max_ms']:.2f} ms")
+    print(f"송신 CPU/프레임 : {result['tx_cpu_ms_per_frame']:.3f} ms")
+    print(f"수신 CPU/프레임 : {result['rx_cpu_ms_per_frame']:.3f} ms")
+    r = result["receiver"]
+    print(f"재조립          : 완성 {r['completed']}, 대체됨 {r['dropped_superseded']}, 지난 프레임 {r['dropped_stale']}, "
+          f"LRU 제거 {r['evicted']}, 만료 {r['expired']}, 손상 {r['corrupt']}")
+    if result["proxy"]:
+        p = result["proxy"]
+        print(f"프록시          : 수신 {p['received']}, 손실 {p['dropped']}, 재정렬 {p['reordered']}, "
+              f"중복 {p['duplicated']}, 전달 {p['forwarded']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="UdpSender/UdpReceiver 루프백 벤치마크")
+    parser.add_argument("--width", type=int, default=config.FRAME_WIDTH, help="프레임 너비")
+    parser.add_argument("--height", type=int, default=config.FRAME_HEIGHT, help="프레임 높이")
+    parser.add_argument("--quality", type=int, default=config.JPEG_QUALITY, help="JPEG 품질")
+    parser.add_argument("--chunk_size", type=int, default=config.CHUNK_SIZE, help="UDP 청크 크기")
+    parser.add_argument("--send_buffer", type=int, default=config.SERVER_SEND_BUFFER, help="송신 소켓 버퍼 크기")
+    parser.add_argument("--recv_buffer", type=int, default=config.CLIENT_RECV_BUFFER, help="수신 소켓 버퍼 크기")
+    parser.add_argument("--fps", type=float, default=config.FRAME_RATE, help="목표 송신 FPS (0: 최대 속도)")
+    parser.add_argument("--duration", type=float, default=10.0, help="측정 시간(초)")
+    parser.add_argument("--rx_port", type=int, default=config.PORT + 100, help="수신기 포트")
+    parser.add_argument("--proxy_port", type=int, default=config.PORT + 101, help="프록시 포트")
+    parser.add_argument("--loss", type=float, default=0.0, help="패킷 손실 확률 (0~1)")
+    parser.add_argument("--reorder", type=float, default=0.0, help="패킷 순서 뒤바뀜 확률 (0~1)")
+    parser.add_argument("--duplicate", type=float, default=0.0, help="패킷 중복 확률 (0~1)")
+    parser.add_argument("--delay_ms", type=float, default=0.0, help="고정 지연(ms)")
+    parser.add_argument("--jitter_ms", type=float, default=0.0, help="추가 무작위 지연 상한(ms)")
+    parser.add_argument("--seed", type=int, help="손실 주입 난수 시드")
+    parser.add_argument("--recv_policy", choices=["latest", "all"], default=config.RECV_POLICY, help="재조립 정책")
+    args = parser.parse_args()
+
+    result = run_benchmark(
+        args.width, args.height, args.quality, args.chunk_size,
+        args.send_buffer, args.recv_buffer, args.fps, args.duration,
+        args.rx_port, args.proxy_port,
+        args.loss, args.reorder, args.duplicate, args.delay_ms, args.jitter_ms,
+        seed=args.seed,
+        recv_policy=args.recv_policy,
+    )
+    print_report(result)
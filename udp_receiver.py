@@ -1,18 +1,57 @@
 import socket
+import struct
 import time
 import numpy as np
-from collections import defaultdict
+from collections import OrderedDict, deque
 import cv2
 
+SEQ_MODULO = 65536 # UdpSender의 frame_seq 범위 (2바이트)
+MOTION_MAGICS = (b"MGK1", b"MGT1") # motion_gate keep-alive/타일 페이로드 매직
+
+
+def seq_newer(a, b):
+    """시퀀스 번호 a가 b보다 최신인지 wraparound를 고려하여 비교합니다."""
+    diff = (a - b) % SEQ_MODULO
+    return 0 < diff < SEQ_MODULO // 2
+
+
 class UdpReceiver:
-    def __init__(self, host_ip, port, buffer_size, timeout=0.5):
+    """UDP 청크를 프레임으로 재조립합니다.
+
+    policy="latest": 프레임 N이 완성되면 N보다 오래된 미완성 프레임을 모두 버리고,
+                     이미 전달한 프레임보다 오래된 프레임은 받지 않습니다 (제어용).
+    policy="all": 완성되는 순서대로 모든 프레임을 전달합니다 (기존 동작).
+    미완성 버퍼는 개수(max_frames)와 바이트(max_bytes)로 제한되며 초과 시 LRU로 제거합니다.
+    """
+
+    def __init__(self, host_ip, port, buffer_size, timeout=0.5, policy="latest",
+                 max_frames=8, max_bytes=8 * 1024 * 1024, max_buffer_age=5.0):
         self.host_ip = host_ip
         self.port = port
         self.buffer_size = buffer_size + 1024 # 헤더 포함 넉넉하게
         self.timeout = timeout
-        self.max_buffer_age = 5.0
+        self.policy = policy
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.max_buffer_age = max_buffer_age
         self.sock = None # 초기값 None
-        self.frame_buffers = defaultdict(lambda: {"data": bytearray(), "expected_size": 0, "chunks": {}, "received_time": 0})
+        self.last_frame_seq = None # 마지막으로 완성된 프레임의 시퀀스 번호
+        self.last_frame_time = 0.0
+        self.last_capture_time = None # 마지막 완성 프레임의 송신측 캡처 시각 (TSP 패킷이 없으면 None)
+        # 시퀀스 -> 버퍼. 가장 최근에 갱신된 버퍼가 뒤쪽 (LRU 순서)
+        self.frame_buffers = OrderedDict()
+        self.buffered_bytes = 0
+        # 최근 완성한 시퀀스. 완성 후 늦게 도착한 END/중복 패킷이 새 버퍼를 만들지 않도록 함
+        self.recent_completed = deque(maxlen=max_frames * 2)
+        self._last_stale_seq = None # dropped_stale을 프레임당 한 번만 세기 위한 마지막 시퀀스
+        self.stats = {
+            "completed": 0,
+            "dropped_superseded": 0, # 더 새로운 프레임이 완성되어 버린 미완성 프레임
+            "dropped_stale": 0, # 이미 전달한 프레임보다 오래되어 받지 않은 프레임
+            "evicted": 0, # 개수/바이트 한도 초과로 LRU 제거된 프레임
+            "expired": 0, # max_buffer_age 초과로 제거된 프레임
+            "corrupt": 0, # 디코딩 검증 실패
+        }
         self._bind_socket() # 소켓 바인딩 시도
 
     def _bind_socket(self):
@@ -73,53 +112,41 @@ class UdpReceiver:
             frame_seq = int.from_bytes(data[0:2], byteorder="big")
             current_time = time.time()
 
-            if len(data) == 6: # 헤더 패킷
-                if frame_seq not in self.frame_buffers:
-                    self.frame_buffers[frame_seq]["expected_size"] = int.from_bytes(data[2:6], byteorder="big")
-                    self.frame_buffers[frame_seq]["received_time"] = current_time
-                    self.frame_buffers[frame_seq]["chunks"] = {}
-                    self.frame_buffers[frame_seq]["data"] = bytearray()
-                return None
+            if len(data) == 6: # 헤더 패킷 (송신기는 6바이트 청크 패킷을 만들지 않음)
+                buffer = self._get_buffer(frame_seq, current_time)
+                if buffer is not None and buffer["expected_size"] is None:
+                    expected_size = int.from_bytes(data[2:6], byteorder="big")
+                    if expected_size > self.max_bytes:
+                        self._remove_buffer(frame_seq)
+                        self.stats["evicted"] += 1 # 한도보다 큰 프레임은 받을 수 없음
+                        return None
+                    buffer["expected_size"] = expected_size
+                    completed_frame_data = self._check_and_assemble(frame_seq, current_time)
 
-            elif len(data) > 2 and data[2:5] == b"END": # 종료 신호
-                if frame_seq in self.frame_buffers:
-                    buffer = self.frame_buffers[frame_seq]
-                    # 완성 여부 체크 (모든 청크 도착 기반 대신, 데이터 길이 기반)
-                    all_chunks = sorted(buffer["chunks"].keys())
-                    if all_chunks: # 청크가 하나라도 있다면 조립 시도
-                        buffer["data"] = bytearray()
-                        for i in all_chunks:
-                            buffer["data"].extend(buffer["chunks"][i])
-
-                    if buffer["expected_size"] > 0 and len(buffer["data"]) >= buffer["expected_size"]:
-                         # 디코딩 시도하여 데이터 유효성 검증 (선택적)
-                         try:
-                             temp_img = np.frombuffer(buffer["data"][:buffer["expected_size"]], dtype=np.uint8)
-                             cv2.imdecode(temp_img, cv2.IMREAD_COLOR) # 디코딩 가능 여부만 확인
-                             completed_frame_data = buffer["data"][:buffer["expected_size"]]
-                             # print(f"프레임 {frame_seq} 완성, 크기: {len(completed_frame_data)}")
-                         except Exception as decode_error:
-                             # print(f"[경고] 프레임 {frame_seq} 데이터 손상 의심 (디코딩 실패): {decode_error}")
-                             pass # 손상된 데이터는 무시
-                         finally:
-                            # 성공/실패 여부와 관계없이 처리된 버퍼는 삭제
-                             del self.frame_buffers[frame_seq]
-                    else: # 데이터 불완전 시 버퍼 유지 (오래된 버퍼는 정리됨)
-                         # print(f"프레임 {frame_seq} 불완전: 기대 {buffer['expected_size']}, 수신 {len(buffer['data'])}")
-                         pass
+            elif len(data) == 13 and data[2:5] == b"TSP": # 캡처 시각 패킷
+                buffer = self._get_buffer(frame_seq, current_time)
+                if buffer is not None:
+                    buffer["capture_time"] = struct.unpack_from("<d", data, 5)[0]
 
+            elif len(data) > 2 and data[2:5] == b"END": # 종료 신호
+                # 완성은 마지막 청크/헤더 도착 시점에 판단하므로 END는 정리 시점으로만 사용
                 self._cleanup_old_buffers(current_time)
-                return completed_frame_data
 
             elif len(data) > 4: # 데이터 청크
-                if frame_seq in self.frame_buffers:
-                    buffer = self.frame_buffers[frame_seq]
+                buffer = self._get_buffer(frame_seq, current_time)
+                if buffer is not None:
                     chunk_id = int.from_bytes(data[2:4], byteorder="big")
                     chunk_data = data[4:]
                     if chunk_id not in buffer["chunks"]:
                         buffer["chunks"][chunk_id] = chunk_data
+                        buffer["bytes"] += len(chunk_data)
+                        self.buffered_bytes += len(chunk_data)
                         buffer["received_time"] = current_time
-                return None
+                        self.frame_buffers.move_to_end(frame_seq)
+                        self._enforce_limits(frame_seq)
+                        completed_frame_data = self._check_and_assemble(frame_seq, current_time)
+
+            return completed_frame_data
 
         except socket.timeout:
             self._cleanup_old_buffers(time.time())
@@ -134,19 +161,118 @@ class UdpReceiver:
             # 이 경우 소켓 문제는 아닐 수 있으므로 일단 계속 진행
             return None
 
-        return completed_frame_data # 정상 처리 시 None 반환 (종료 신호 처리 시에만 데이터 반환)
 
+    def _get_buffer(self, frame_seq, current_time):
+        """(내부 함수) 프레임 버퍼를 반환하고, 없으면 새로 만듭니다.
+
+        헤더/캡처 시각/청크 중 어느 패킷이 먼저 도착해도 버퍼를 만들며, 이미 완성했거나
+        지난 프레임이면 None을 반환합니다.
+        """
+        buffer = self.frame_buffers.get(frame_seq)
+        if buffer is not None:
+            return buffer
+        if frame_seq in self.recent_completed or self._is_stale(frame_seq, current_time):
+            return None
+        buffer = {
+            "expected_size": None, # 헤더가 도착해야 알 수 있음
+            "chunks": {},
+            "bytes": 0,
+            "received_time": current_time,
+            "capture_time": None,
+        }
+        self.frame_buffers[frame_seq] = buffer
+        self._enforce_limits(frame_seq)
+        return buffer
+
+    def _check_and_assemble(self, frame_seq, current_time):
+        """(내부 함수) 헤더와 모든 청크가 도착했으면 프레임을 조립하여 반환합니다.
+
+        패킷 도착 순서와 무관하게, 받은 청크 바이트가 기대 크기 이상이고 청크 번호가
+        0부터 빠짐없이 이어지면 완성으로 봅니다.
+        """
+        buffer = self.frame_buffers[frame_seq]
+        expected_size = buffer["expected_size"]
+        chunks = buffer["chunks"]
+        if not expected_size or buffer["bytes"] < expected_size or max(chunks, default=-1) != len(chunks) - 1:
+            return None
+
+        self._remove_buffer(frame_seq)
+        self.recent_completed.append(frame_seq)
+        frame_data = bytearray().join(chunks[i] for i in range(len(chunks)))[:expected_size]
+        if not self._is_valid_payload(frame_data):
+            self.stats["corrupt"] += 1 # 손상된 데이터는 무시
+            return None
+
+        self.last_frame_seq = frame_seq
+        self.last_frame_time = current_time
+        self.last_capture_time = buffer["capture_time"]
+        self.stats["completed"] += 1
+        if self.policy == "latest":
+            self._drop_superseded(frame_seq)
+        return frame_data
+
+    @staticmethod
+    def _is_valid_payload(frame_data):
+        """(내부 함수) JPEG 페이로드가 디코딩 가능한지 확인합니다.
 
-    def _check_and_assemble(self, frame_seq):
-         # 이 메서드는 종료 신호 처리 로직으로 통합되어 사용하지 않음
-         pass
+        motion_gate의 타일/keep-alive 페이로드는 JPEG가 아니므로 FrameCompositor가 검증합니다.
+        """
+        if bytes(frame_data[:4]) in MOTION_MAGICS:
+            return True
+        try:
+            return cv2.imdecode(np.frombuffer(frame_data, dtype=np.uint8), cv2.IMREAD_COLOR) is not None
+        except cv2.error:
+            return False
 
     def _cleanup_old_buffers(self, current_time):
         """(내부 함수) 오래된 프레임 버퍼를 정리합니다."""
-        old_seqs = [seq for seq, buf in self.frame_buffers.items() if current_time - buf["received_time"] > self.max_buffer_age]
+        # LRU 순서이므로 앞쪽부터 오래된 버퍼만 확인하면 됨
+        while self.frame_buffers:
+            seq, buf = next(iter(self.frame_buffers.items()))
+            if current_time - buf["received_time"] <= self.max_buffer_age:
+                break
+            # print(f"[정보] 오래된 버퍼 정리: 시퀀스 {seq}, 크기 {buf['bytes']}/{buf['expected_size']}")
+            self._remove_buffer(seq)
+            self.stats["expired"] += 1
+
+    def _remove_buffer(self, seq):
+        """(내부 함수) 버퍼를 제거하고 바이트 합계를 갱신합니다."""
+        buf = self.frame_buffers.pop(seq, None)
+        if buf is not None:
+            self.buffered_bytes -= buf["bytes"]
+
+    def _enforce_limits(self, keep_seq):
+        """(내부 함수) 개수/바이트 한도를 넘으면 가장 오래 갱신되지 않은 버퍼부터 제거합니다."""
+        while self.frame_buffers and (
+            len(self.frame_buffers) > self.max_frames or self.buffered_bytes > self.max_bytes
+        ):
+            seq = next(iter(self.frame_buffers))
+            if seq == keep_seq: # 방금 갱신한 버퍼만 남은 경우
+                break
+            self._remove_buffer(seq)
+            self.stats["evicted"] += 1
+
+    def _drop_superseded(self, completed_seq):
+        """(내부 함수) 완성된 프레임보다 오래된 미완성 프레임을 한 번에 버립니다."""
+        old_seqs = [seq for seq in self.frame_buffers if not seq_newer(seq, completed_seq)]
         for seq in old_seqs:
-            # print(f"[정보] 오래된 버퍼 정리: 시퀀스 {seq}, 크기 {len(self.frame_buffers[seq]['data'])}/{self.frame_buffers[seq]['expected_size']}")
-            del self.frame_buffers[seq]
+            self._remove_buffer(seq)
+        self.stats["dropped_superseded"] += len(old_seqs)
+
+    def _is_stale(self, frame_seq, current_time):
+        """(내부 함수) latest 정책에서 이미 전달한 프레임보다 오래된 프레임인지 확인합니다."""
+        if self.policy != "latest" or self.last_frame_seq is None:
+            return False
+        if seq_newer(frame_seq, self.last_frame_seq):
+            return False
+        if current_time - self.last_frame_time > self.max_buffer_age:
+            # 오랫동안 새 프레임이 없으면 송신기 재시작으로 보고 기준 초기화
+            self.last_frame_seq = None
+            return False
+        if frame_seq != self._last_stale_seq: # 같은 프레임의 나머지 패킷은 다시 세지 않음
+            self._last_stale_seq = frame_seq
+            self.stats["dropped_stale"] += 1
+        return True
 
     def close(self):
         """UDP 소켓을 닫습니다."""
@@ -1,4 +1,5 @@
 import socket
+import struct
 import cv2
 import time
 import numpy as np
@@ -12,6 +13,7 @@ class UdpSender:
         self.reconnect_delay = reconnect_delay # 재연결 시도 간격 (초)
         self.sock = None # 초기에는 None으로 설정
         self.frame_seq = 0
+        self.last_frame_size = 0 # 마지막으로 인코딩된 프레임 크기 (바이트)
         self._create_socket() # 초기 소켓 생성 시도
 
     def _create_socket(self):
@@ -42,8 +44,11 @@ class UdpSender:
                  return False
 
 
-    def send_frame(self, frame, quality):
-        """프레임을 압축하고 청크로 나누어 UDP로 전송합니다. 실패 시 재연결을 시도합니다."""
+    def send_frame(self, frame, quality, capture_time=None):
+        """프레임을 압축하고 청크로 나누어 UDP로 전송합니다. 실패 시 재연결을 시도합니다.
+
+        capture_time(time.time() 기준)을 주면 헤더 다음에 캡처 시각 패킷을 함께 보냅니다.
+        """
         if frame is None:
             return False # 프레임 없음
 
@@ -61,8 +66,19 @@ class UdpSender:
             print("[오류] 이미지 인코딩 실패")
             return False
 
-        img_bytes = img_encoded.tobytes()
+        return self.send_payload(img_encoded.tobytes(), capture_time)
+
+    def send_payload(self, img_bytes, capture_time=None):
+        """이미 인코딩된 페이로드를 한 프레임으로 청크 전송합니다 (motion_gate 타일/keep-alive 등)."""
+        if not self.sock:
+            print("[정보] 소켓이 유효하지 않아 재연결 시도 중...")
+            if not self._create_socket():
+                print("[오류] 소켓 재생성 실패. 전송 건너뜀.")
+                time.sleep(self.reconnect_delay)
+                return False
+
         data_len = len(img_bytes)
+        self.last_frame_size = data_len
 
         # 프레임 시퀀스 번호 증가
         self.frame_seq = (self.frame_seq + 1) % 65536
@@ -71,14 +87,20 @@ class UdpSender:
             # 프레임 헤더 정보 전송
             header = self.frame_seq.to_bytes(2, byteorder="big") + data_len.to_bytes(4, byteorder="big")
             self.sock.sendto(header, (self.target_ip, self.port))
+            if capture_time is not None:
+                # 캡처 시각 패킷: seq + b"TSP" + f64. 기존 수신기는 범위 밖 청크로 보고 잘라냄
+                ts_packet = self.frame_seq.to_bytes(2, byteorder="big") + b"TSP" + struct.pack("<d", capture_time)
+                self.sock.sendto(ts_packet, (self.target_ip, self.port))
 
             # 데이터를 청크로 나누어 전송
-            chunk_id = 0
-            for i in range(0, data_len, self.chunk_size):
-                chunk = img_bytes[i : i + self.chunk_size]
+            bounds = list(range(0, data_len, self.chunk_size)) + [data_len]
+            if len(bounds) > 2 and bounds[-1] - bounds[-2] == 2:
+                # 2바이트 청크는 6바이트 패킷이 되어 헤더와 구분되지 않으므로 직전 청크를 1바이트 줄임
+                bounds[-2] -= 1
+            for chunk_id, (start, end) in enumerate(zip(bounds, bounds[1:])):
+                chunk = img_bytes[start:end]
                 chunk_header = self.frame_seq.to_bytes(2, byteorder="big") + chunk_id.to_bytes(2, byteorder="big")
                 self.sock.sendto(chunk_header + chunk, (self.target_ip, self.port))
-                chunk_id += 1
                 # time.sleep(0.0001) # 선택적 딜레이
 
             # 프레임 종료 신호 전송